@@ -2,14 +2,16 @@
 """Unified command-line interface for EDU ASR."""
 
 import argparse
+import functools
 import sys
 from pathlib import Path
 from . import transcribe_batch
 from .db import TranscriptDB, print_search_results, print_kwic_results, format_time
 
 
+@functools.cache
 def create_parser():
-    """Create the main argument parser."""
+    """Create the main argument parser (built once per process)."""
     parser = argparse.ArgumentParser(
         description="EDU ASR unified command-line interface",
         prog="eduasr"
@@ -30,8 +32,10 @@ def create_parser():
     # Add all transcribe arguments
     transcribe_parser.add_argument("--rclone-remote", help="Rclone remote name")
     transcribe_parser.add_argument("--remote-path", help="Remote path to sync from")
+    transcribe_parser.add_argument("--backend", help="Read directly from object storage instead of rclone (e.g. s3://bucket/prefix)")
     transcribe_parser.add_argument("--input_dir", help="Local input directory")
     transcribe_parser.add_argument("--scratch-dir", help="Scratch directory for temporary files")
+    transcribe_parser.add_argument("--scratch-tmpfs", action="store_true", help="Use /dev/shm (RAM) as the scratch directory")
     transcribe_parser.add_argument("--include-ext", help="File extensions to include (comma-separated)")
     transcribe_parser.add_argument("--max-files", type=int, help="Maximum number of files to process")
     transcribe_parser.add_argument("--output_dir", required=True, help="Output directory for transcripts")
@@ -46,7 +50,9 @@ def create_parser():
     transcribe_parser.add_argument("--wait-if-low-disk", action="store_true", help="Wait if disk space is low")
     transcribe_parser.add_argument("--check-interval-s", type=int, help="Disk check interval in seconds")
     transcribe_parser.add_argument("--max-wait-min", type=int, help="Maximum wait time in minutes")
-    transcribe_parser.add_argument("--run-log", help="Run log file path")
+    transcribe_parser.add_argument("--run-log", help="Run log file path (JSON lines, e.g. out/run_log.jsonl)")
+    transcribe_parser.add_argument("--workers", type=int, help="Worker processes for local input (each loads its own models)")
+    transcribe_parser.add_argument("--devices", help="Comma-separated devices assigned to workers round-robin (e.g. cuda:0,cuda:1)")
     
     # Import subcommand
     import_parser = subparsers.add_parser(
@@ -120,111 +126,145 @@ def create_parser():
     return parser
 
 
-def main():
-    """Main CLI entry point."""
-    parser = create_parser()
-    args = parser.parse_args()
-    
-    if args.command == "transcribe":
-        # Set up sys.argv for the transcribe_batch module
-        argv = ['transcribe_batch.py']
-        for arg in vars(args):
-            if arg != "command" and getattr(args, arg) is not None:
-                value = getattr(args, arg)
-                flag = f"--{arg}"  # Keep underscores as they are
-                if isinstance(value, bool):
-                    if value:
-                        argv.append(flag)
-                else:
-                    argv.extend([flag, str(value)])
-        
-        # Temporarily replace sys.argv and call the main function
-        original_argv = sys.argv[:]
-        try:
-            sys.argv = argv
-            return transcribe_batch.main()
-        finally:
-            sys.argv = original_argv
-    
-    elif args.command == "import":
-        with TranscriptDB(args.db) as db:
-            print(f"Importing transcripts from {args.transcripts_dir} into {args.db}")
-            stats = db.import_transcript_files(args.transcripts_dir, args.force)
-            print(f"\n📊 Import complete:")
-            print(f"   ✅ Imported: {stats['imported']}")
-            print(f"   🔄 Updated: {stats['updated']}")
-            print(f"   ⏭️  Skipped: {stats['skipped']}")
-            print(f"   ❌ Errors: {stats['errors']}")
-        return 0
-    
-    elif args.command == "search":
-        with TranscriptDB(args.db) as db:
-            results = db.search(args.query, args.limit)
-            print_search_results(results, args.query)
-        return 0
+def run_transcribe(args):
+    """Run batch transcription by forwarding the parsed options to transcribe_batch."""
+    # Set up sys.argv for the transcribe_batch module
+    argv = ['transcribe_batch.py']
+    for arg in vars(args):
+        if arg != "command" and getattr(args, arg) is not None:
+            value = getattr(args, arg)
+            flag = f"--{arg}"  # Keep underscores as they are
+            if isinstance(value, bool):
+                if value:
+                    argv.append(flag)
+            else:
+                argv.extend([flag, str(value)])
     
-    elif args.command == "kwic":
-        with TranscriptDB(args.db) as db:
-            results = db.kwic(args.query, args.context, args.limit)
-            print_kwic_results(results, args.query)
-        return 0
+    # Temporarily replace sys.argv and call the main function
+    original_argv = sys.argv[:]
+    try:
+        sys.argv = argv
+        return transcribe_batch.main()
+    finally:
+        sys.argv = original_argv
+
+
+def run_import(args):
+    """Import transcripts from ``args.transcripts_dir`` into ``args.db``."""
+    with TranscriptDB(args.db) as db:
+        print(f"Importing transcripts from {args.transcripts_dir} into {args.db}")
+        stats = db.import_transcript_files(args.transcripts_dir, args.force)
+        print(f"\n📊 Import complete:")
+        print(f"   ✅ Imported: {stats['imported']}")
+        print(f"   🔄 Updated: {stats['updated']}")
+        print(f"   ⏭️  Skipped: {stats['skipped']}")
+        print(f"   ❌ Errors: {stats['errors']}")
+    return 0
+
+
+def run_search(args):
+    """Full-text search and print matching segments."""
+    with TranscriptDB(args.db) as db:
+        results = db.search(args.query, args.limit)
+        print_search_results(results, args.query)
+    return 0
+
+
+def run_kwic(args):
+    """Keyword-in-context search and print the concordance lines."""
+    with TranscriptDB(args.db) as db:
+        results = db.kwic(args.query, args.context, args.limit)
+        print_kwic_results(results, args.query)
+    return 0
+
+
+def run_list(args):
+    """List transcripts in the database."""
+    with TranscriptDB(args.db) as db:
+        transcripts = db.list_transcripts(args.limit)
+        print(f"\n📝 Transcripts in database:\n")
+        for i, t in enumerate(transcripts, 1):
+            duration = format_time(t['duration_seconds'])
+            print(f"[{i:2d}] {t['title']} ({t['filename']})")
+            print(f"     Duration: {duration} | Segments: {t['segment_count']} | Speakers: {t['speaker_count']}")
+            print(f"     Created: {t['created_at'][:19]}")
+            print()
+    return 0
+
+
+def run_stats(args):
+    """Print database statistics."""
+    with TranscriptDB(args.db) as db:
+        stats = db.get_transcript_stats()
+        print(f"\n📊 Database Statistics:")
+        print(f"   📝 Transcripts: {stats['transcript_count']}")
+        print(f"   💬 Segments: {stats['segment_count']:,}")
+        print(f"   ⏱️  Total Duration: {stats['total_duration_hours']:.1f} hours")
+        print(f"\n🏆 Longest Transcripts:")
+        for i, t in enumerate(stats['longest_transcripts'], 1):
+            duration = format_time(t['duration_seconds'])
+            print(f"   {i}. {t['filename']} ({duration})")
+    return 0
+
+
+def run_export_csv(args):
+    """Export JSON transcripts in ``args.output_dir`` to CSV."""
+    from .transcribe_batch import batch_export_csv, configure_logging
+    configure_logging()
+    batch_export_csv(args.output_dir, args.force)
+    return 0
+
+
+def run_summarize(args):
+    """Summarize transcripts with LM Studio, or test the connection."""
+    from .summarizer import batch_summarize, LMStudioSummarizer, load_summarizer_config
     
-    elif args.command == "list":
-        with TranscriptDB(args.db) as db:
-            transcripts = db.list_transcripts(args.limit)
-            print(f"\n📝 Transcripts in database:\n")
-            for i, t in enumerate(transcripts, 1):
-                duration = format_time(t['duration_seconds'])
-                print(f"[{i:2d}] {t['title']} ({t['filename']})")
-                print(f"     Duration: {duration} | Segments: {t['segment_count']} | Speakers: {t['speaker_count']}")
-                print(f"     Created: {t['created_at'][:19]}")
-                print()
+    if args.test:
+        # Test connection to LM Studio
+        config = load_summarizer_config(Path(args.config) if args.config else None)
+        summarizer = LMStudioSummarizer(config)
+        if summarizer.test_connection():
+            print("✅ LM Studio connection test successful!")
+            return 0
+        else:
+            print("❌ LM Studio connection test failed!")
+            return 1
+    else:
+        # Run batch summarization
+        batch_summarize(args.output_dir, args.config, args.force)
         return 0
+
+
+def run_collate_summaries(args):
+    """Collate all summaries into a single markdown file."""
+    from .summarizer import collate_summaries_to_markdown
     
-    elif args.command == "stats":
-        with TranscriptDB(args.db) as db:
-            stats = db.get_transcript_stats()
-            print(f"\n📊 Database Statistics:")
-            print(f"   📝 Transcripts: {stats['transcript_count']}")
-            print(f"   💬 Segments: {stats['segment_count']:,}")
-            print(f"   ⏱️  Total Duration: {stats['total_duration_hours']:.1f} hours")
-            print(f"\n🏆 Longest Transcripts:")
-            for i, t in enumerate(stats['longest_transcripts'], 1):
-                duration = format_time(t['duration_seconds'])
-                print(f"   {i}. {t['filename']} ({duration})")
-        return 0
+    success = collate_summaries_to_markdown(args.output_dir, args.output_file)
+    return 0 if success else 1
+
+
+COMMANDS = {
+    "transcribe": run_transcribe,
+    "import": run_import,
+    "search": run_search,
+    "kwic": run_kwic,
+    "list": run_list,
+    "stats": run_stats,
+    "export-csv": run_export_csv,
+    "summarize": run_summarize,
+    "collate-summaries": run_collate_summaries,
+}
+
+
+def main():
+    """Main CLI entry point: parse arguments and dispatch to the ``run_*`` command."""
+    parser = create_parser()
+    args = parser.parse_args()
     
-    elif args.command == "export-csv":
-        from .transcribe_batch import batch_export_csv
-        batch_export_csv(args.output_dir, args.force)
+    handler = COMMANDS.get(args.command)
+    if handler is None:
         return 0
-    
-    elif args.command == "summarize":
-        from .summarizer import batch_summarize, LMStudioSummarizer, load_summarizer_config
-        from pathlib import Path
-        
-        if args.test:
-            # Test connection to LM Studio
-            config = load_summarizer_config(Path(args.config) if args.config else None)
-            summarizer = LMStudioSummarizer(config)
-            if summarizer.test_connection():
-                print("✅ LM Studio connection test successful!")
-                return 0
-            else:
-                print("❌ LM Studio connection test failed!")
-                return 1
-        else:
-            # Run batch summarization
-            batch_summarize(args.output_dir, args.config, args.force)
-            return 0
-    
-    elif args.command == "collate-summaries":
-        from .summarizer import collate_summaries_to_markdown
-        
-        success = collate_summaries_to_markdown(args.output_dir, args.output_file)
-        return 0 if success else 1
-    
-    return 0
+    return handler(args)
 
 
 if __name__ == "__main__":
@@ -8,18 +8,54 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import hashlib
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib parser
+    orjson = None
+
+
+def load_json_file(path: Path) -> Any:
+    """Parse a JSON file straight from bytes, using orjson when available."""
+    raw = path.read_bytes()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
 
 
 class TranscriptDB:
     """SQLite database for storing and searching transcripts with FTS5."""
     
+    # Applied in order on every connection. Temp B-trees stay in RAM and bulk
+    # imports get a ~200 MB page cache. WAL appends commits instead of
+    # rewriting a rollback journal, and with synchronous=NORMAL only syncs at
+    # checkpoints; readers never block the importer
+    PRAGMAS = (
+        "temp_store=MEMORY",
+        "cache_size=-200000",
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+    )
+    
     def __init__(self, db_path: str):
-        """Initialize database connection and create tables if needed."""
+        """Initialize database connection and create tables if needed.
+        
+        ``db_path`` may also be a SQLite ``file:`` URI, e.g. an in-memory
+        database shared by name (``file:name?mode=memory&cache=shared``).
+        """
+        is_uri = str(db_path).startswith('file:')
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if not is_uri:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
-        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn = sqlite3.connect(str(db_path), uri=is_uri)
         self.conn.row_factory = sqlite3.Row  # Enable dict-like access
+        for pragma in self.PRAGMAS:
+            self.conn.execute(f"PRAGMA {pragma}")
         self.create_tables()
     
     def create_tables(self):
@@ -63,6 +99,33 @@ class TranscriptDB:
             )
         """)
         
+        # Indexes for per-transcript segment lookups (re-import deletes, ordered
+        # reads), speaker filters and the newest-first transcript listing
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_segments_transcript
+            ON segments (transcript_id, segment_index)
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_segments_speaker ON segments (speaker)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_created ON transcripts (created_at)")
+        
+        # FTS5 indexes each segment with its transcript's filename and title.
+        # Those live in another table, so the external content is a view
+        cursor.execute("""
+            CREATE VIEW IF NOT EXISTS segments_fts_source AS
+            SELECT s.id, s.text, s.speaker, t.filename, t.title
+            FROM segments s JOIN transcripts t ON t.id = s.transcript_id
+        """)
+        
+        # Databases created before the view pointed the index at segments
+        # itself, which has no filename/title columns; rebuild those
+        row = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'segments_fts'").fetchone()
+        rebuild = row is not None and 'segments_fts_source' not in row[0]
+        if rebuild:
+            cursor.execute("DROP TRIGGER IF EXISTS segments_ai")
+            cursor.execute("DROP TRIGGER IF EXISTS segments_ad")
+            cursor.execute("DROP TABLE segments_fts")
+        
         # FTS5 virtual table for full-text search
         cursor.execute("""
             CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
@@ -70,10 +133,12 @@ class TranscriptDB:
                 speaker,
                 filename,
                 title,
-                content='segments',
+                content='segments_fts_source',
                 content_rowid='id'
             )
         """)
+        if rebuild:
+            cursor.execute("INSERT INTO segments_fts(segments_fts) VALUES('rebuild')")
         
         # Triggers to keep FTS5 in sync
         cursor.execute("""
@@ -88,60 +153,112 @@ class TranscriptDB:
         cursor.execute("""
             CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
                 INSERT INTO segments_fts(segments_fts, rowid, text, speaker, filename, title)
-                VALUES('delete', old.id, old.text, old.speaker, '', '');
+                SELECT 'delete', old.id, old.text, old.speaker,
+                       (SELECT filename FROM transcripts WHERE id = old.transcript_id),
+                       (SELECT title FROM transcripts WHERE id = old.transcript_id);
             END
         """)
         
-        cursor.execute("""
-            CREATE TRIGGER IF NOT EXISTS segments_au AFTER UPDATE ON segments BEGIN
-                INSERT INTO segments_fts(segments_fts, rowid, text, speaker, filename, title)
-                VALUES('delete', old.id, old.text, old.speaker, '', '');
-                INSERT INTO segments_fts(rowid, text, speaker, filename, title)
-                SELECT new.id, new.text, new.speaker,
-                       (SELECT filename FROM transcripts WHERE id = new.transcript_id),
-                       (SELECT title FROM transcripts WHERE id = new.transcript_id);
-            END
-        """)
+        # Segments are only ever inserted or deleted (re-import replaces them),
+        # so no UPDATE trigger; drop the one older databases still carry
+        cursor.execute("DROP TRIGGER IF EXISTS segments_au")
         
         self.conn.commit()
     
     def calculate_file_hash(self, file_path: Path) -> str:
-        """Calculate MD5 hash of a file for change detection."""
-        hash_md5 = hashlib.md5()
-        if file_path.exists():
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """Calculate a BLAKE2b hash (32 hex chars) of a file for change detection."""
+        if not file_path.exists():
+            return hashlib.blake2b(digest_size=16).hexdigest()
+        with open(file_path, "rb") as f:
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+
+                return hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+            digest = hashlib.blake2b(digest_size=16)
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+            return digest.hexdigest()
     
     def import_transcript_files(self, transcripts_dir: str, force: bool = False) -> Dict[str, int]:
         """Import all transcript files from a directory."""
-        transcripts_path = Path(transcripts_dir)
-        stats = {"imported": 0, "updated": 0, "skipped": 0, "errors": 0}
-        
         # Find all JSON transcript files
-        json_files = list(transcripts_path.glob("*.json"))
+        json_files = list(Path(transcripts_dir).glob("*.json"))
         
         print(f"Found {len(json_files)} JSON transcript files")
         
-        for json_file in json_files:
+        return self.import_many(json_files, force)
+    
+    def import_many(self, json_files: List[Path], force: bool = False) -> Dict[str, int]:
+        """Import a list of transcript JSON files in a single transaction.
+        
+        Related .srt/.vtt/.txt files are looked up next to each JSON file.
+        """
+        json_files = [Path(f) for f in json_files]
+        stats = {"imported": 0, "updated": 0, "skipped": 0, "errors": 0}
+        
+        # Hash and parse on a thread pool (file reads release the GIL); the
+        # SQLite writes below stay on this thread
+        known_hashes = {
+            row['filename']: row['file_hash']
+            for row in self.conn.execute("SELECT filename, file_hash FROM transcripts")
+        }
+        
+        def load(json_file: Path):
             try:
-                result = self.import_single_transcript(json_file, transcripts_path, force)
-                stats[result] += 1
-                
-                if result in ["imported", "updated"]:
-                    print(f"✅ {result.title()}: {json_file.name}")
-                elif result == "skipped":
-                    print(f"⏭️  Skipped: {json_file.name} (already imported)")
-                
+                file_hash = self.calculate_file_hash(json_file)
+                if not force and known_hashes.get(json_file.stem) == file_hash:
+                    return file_hash, None, None
+                return file_hash, load_json_file(json_file), None
             except Exception as e:
-                print(f"❌ Error importing {json_file.name}: {e}")
-                stats["errors"] += 1
+                return None, None, e
+        
+        # One transaction for the whole batch; a savepoint per file lets a bad
+        # file roll back on its own without losing the rest
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        workers = min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # Keep at most 2x workers files parsed ahead of the writer so
+            # memory stays flat however large the corpus is
+            pending = deque()
+            files = iter(json_files)
+            for json_file in islice(files, 2 * workers):
+                pending.append((json_file, pool.submit(load, json_file)))
+            while pending:
+                json_file, future = pending.popleft()
+                file_hash, data, error = future.result()
+                for next_file in islice(files, 1):
+                    pending.append((next_file, pool.submit(load, next_file)))
+                self.conn.execute("SAVEPOINT import_file")
+                try:
+                    if error is not None:
+                        raise error
+                    result = self.import_single_transcript(json_file, json_file.parent, force,
+                                                           file_hash=file_hash, data=data, commit=False)
+                    self.conn.execute("RELEASE import_file")
+                    stats[result] += 1
+                    
+                    if result in ["imported", "updated"]:
+                        print(f"✅ {result.title()}: {json_file.name}")
+                    elif result == "skipped":
+                        print(f"⏭️  Skipped: {json_file.name} (already imported)")
+                    
+                except Exception as e:
+                    self.conn.execute("ROLLBACK TO import_file")
+                    self.conn.execute("RELEASE import_file")
+                    print(f"❌ Error importing {json_file.name}: {e}")
+                    stats["errors"] += 1
+        self.conn.commit()
         
         return stats
     
-    def import_single_transcript(self, json_file: Path, base_dir: Path, force: bool = False) -> str:
-        """Import a single transcript file. Returns 'imported', 'updated', or 'skipped'."""
+    def import_single_transcript(self, json_file: Path, base_dir: Path, force: bool = False,
+                                 file_hash: Optional[str] = None, data: Optional[Dict[str, Any]] = None,
+                                 commit: bool = True) -> str:
+        """Import a single transcript file. Returns 'imported', 'updated', or 'skipped'.
+        
+        ``file_hash`` and ``data`` may be supplied when the caller has already
+        hashed or parsed the file. Pass ``commit=False`` to leave the
+        transaction open for a batch import.
+        """
         filename = json_file.stem
         
         # Check if already exists
@@ -150,15 +267,15 @@ class TranscriptDB:
         existing = cursor.fetchone()
         
         # Calculate current file hash
-        current_hash = self.calculate_file_hash(json_file)
+        current_hash = file_hash or self.calculate_file_hash(json_file)
         
         if existing and not force:
             if existing['file_hash'] == current_hash:
                 return "skipped"
         
         # Load JSON data
-        with open(json_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        if data is None:
+            data = load_json_file(json_file)
         
         # Extract metadata
         segments = data.get('segments', [])
@@ -181,6 +298,12 @@ class TranscriptDB:
         
         # Insert or update transcript record
         if existing:
+            transcript_id = existing['id']
+            
+            # Delete existing segments while the transcript row still has the
+            # title they were indexed under
+            cursor.execute("DELETE FROM segments WHERE transcript_id = ?", (transcript_id,))
+            
             cursor.execute("""
                 UPDATE transcripts SET
                     file_hash = ?, title = ?, duration_seconds = ?, segment_count = ?,
@@ -193,12 +316,8 @@ class TranscriptDB:
                 str(srt_file) if srt_file.exists() else None,
                 str(vtt_file) if vtt_file.exists() else None,
                 str(txt_file) if txt_file.exists() else None,
-                existing['id']
+                transcript_id
             ))
-            transcript_id = existing['id']
-            
-            # Delete existing segments
-            cursor.execute("DELETE FROM segments WHERE transcript_id = ?", (transcript_id,))
             result_type = "updated"
         else:
             cursor.execute("""
@@ -218,64 +337,93 @@ class TranscriptDB:
             result_type = "imported"
         
         # Insert segments
-        for i, segment in enumerate(segments):
-            cursor.execute("""
-                INSERT INTO segments (
-                    transcript_id, segment_index, start_time, end_time,
-                    speaker, text, confidence
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+        self._insert_segments(cursor, transcript_id, segments)
+        
+        if commit:
+            self.conn.commit()
+        return result_type
+    
+    def _insert_segments(self, cursor: sqlite3.Cursor, transcript_id: int,
+                         segments: List[Dict[str, Any]], start_index: int = 0):
+        """Insert segment dicts for a transcript with one executemany."""
+        cursor.executemany("""
+            INSERT INTO segments (
+                transcript_id, segment_index, start_time, end_time,
+                speaker, text, confidence
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
                 transcript_id, i,
                 segment.get('start', 0),
                 segment.get('end', 0),
                 segment.get('speaker', ''),
                 segment.get('text', ''),
                 segment.get('confidence', 0)
-            ))
-        
-        self.conn.commit()
-        return result_type
+            )
+            for i, segment in enumerate(segments, start_index)
+        ])
+    
+    def append_segments(self, transcript_id: int, segments: List[Dict[str, Any]]) -> int:
+        """Append WhisperX-style segment dicts to an existing transcript.
+        
+        The segments are numbered after the transcript's last segment and its
+        segment count, speaker count and duration are updated, all in one
+        transaction. Returns the number of segments added.
+        """
+        with self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT COALESCE(MAX(segment_index) + 1, 0) FROM segments WHERE transcript_id = ?",
+                (transcript_id,))
+            self._insert_segments(cursor, transcript_id, segments, cursor.fetchone()[0])
+            cursor.execute("""
+                UPDATE transcripts SET
+                    segment_count = (SELECT COUNT(*) FROM segments WHERE transcript_id = :id),
+                    speaker_count = (SELECT COUNT(DISTINCT speaker) FROM segments
+                                     WHERE transcript_id = :id AND speaker != ''),
+                    duration_seconds = MAX(COALESCE(duration_seconds, 0),
+                                           (SELECT COALESCE(MAX(end_time), 0) FROM segments
+                                            WHERE transcript_id = :id)),
+                    updated_at = :now
+                WHERE id = :id
+            """, {'id': transcript_id, 'now': datetime.now().isoformat()})
+        return len(segments)
     
     def generate_title(self, filename: str) -> str:
         """Generate a human-readable title from filename."""
-        # Remove common prefixes and clean up
-        title = filename
-        
-        # Handle date patterns like "2025-07-28-"
-        title = re.sub(r'^\d{4}-\d{2}-\d{2}-', '', title)
-        
-        # Replace hyphens and underscores with spaces
-        title = title.replace('-', ' ').replace('_', ' ')
-        
-        # Capitalize words
-        title = ' '.join(word.capitalize() for word in title.split())
-        
-        # Clean up common patterns
-        title = re.sub(r'\b\d+\b$', '', title).strip()  # Remove trailing numbers
-        title = re.sub(r'\s+', ' ', title)  # Multiple spaces to single
-        
-        return title or filename
+        return _title_from_filename(filename)
     
-    def search(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Full-text search across all transcripts."""
+    def _match_segments(self, query: str, limit: int, open_mark: str, close_mark: str,
+                        ellipsis: str = '', tokens: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run an FTS5 query, best bm25 score first, with each segment's text marked up.
+        
+        With ``tokens`` the markup is a snippet() of that many tokens; without
+        it the whole text is returned by highlight().
+        """
         cursor = self.conn.cursor()
         
         # Use FTS5 MATCH syntax - escape query for safety
         escaped_query = f'"{query}"' if ' ' in query else query
         
-        cursor.execute("""
+        if tokens is None:
+            markup, markup_params = "highlight(segments_fts, 0, ?, ?)", (open_mark, close_mark)
+        else:
+            markup = "snippet(segments_fts, 0, ?, ?, ?, ?)"
+            markup_params = (open_mark, close_mark, ellipsis, tokens)
+        
+        cursor.execute(f"""
             SELECT 
                 s.id, s.transcript_id, s.segment_index, s.start_time, s.end_time,
                 s.speaker, s.text, s.confidence,
                 t.filename, t.title, t.duration_seconds,
-                snippet(segments_fts, 0, '<mark>', '</mark>', '...', 32) as snippet
+                {markup} as snippet
             FROM segments_fts
-            JOIN segments s ON s.text = segments_fts.text AND s.speaker = segments_fts.speaker
-            JOIN transcripts t ON t.id = s.transcript_id AND t.filename = segments_fts.filename
+            JOIN segments s ON s.id = segments_fts.rowid
+            JOIN transcripts t ON t.id = s.transcript_id
             WHERE segments_fts MATCH ?
-            ORDER BY rank
+            ORDER BY bm25(segments_fts)
             LIMIT ?
-        """, (escaped_query, limit))
+        """, (*markup_params, escaped_query, limit))
         
         results = []
         for row in cursor.fetchall():
@@ -295,45 +443,29 @@ class TranscriptDB:
         
         return results
     
+    def search(self, query: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Full-text search across all transcripts."""
+        return self._match_segments(query, limit, '<mark>', '</mark>', '...', 32)
+    
     def kwic(self, query: str, context_words: int = 10, limit: int = 50) -> List[Dict[str, Any]]:
         """Keyword in context search."""
-        results = self.search(query, limit)
+        # FTS5 already knows where the match is; highlight() marks it with
+        # control characters in the full text (a phrase is one marked span),
+        # and the context is cut from the words on either side
+        results = self._match_segments(query, limit, '\x02', '\x03')
         
-        # Enhance with better context
         for result in results:
-            text = result['text']
-            
-            # Find query position (case-insensitive)
-            query_pattern = re.compile(re.escape(query), re.IGNORECASE)
-            match = query_pattern.search(text)
+            marked = result.pop('snippet') or ''
+            if '\x02' not in marked:
+                continue
+            left, _, rest = marked.partition('\x02')
+            keyword, _, right = rest.partition('\x03')
+            # Only the first hit is the keyword; unmark any later ones
+            right = right.replace('\x02', '').replace('\x03', '')
             
-            if match:
-                start, end = match.span()
-                words = text.split()
-                
-                # Find word boundaries around the match
-                char_to_word = {}
-                char_pos = 0
-                for word_idx, word in enumerate(words):
-                    for _ in range(len(word)):
-                        char_to_word[char_pos] = word_idx
-                        char_pos += 1
-                    char_pos += 1  # space
-                
-                start_word = char_to_word.get(start, 0)
-                end_word = char_to_word.get(end, len(words) - 1)
-                
-                # Extract context
-                context_start = max(0, start_word - context_words)
-                context_end = min(len(words), end_word + context_words + 1)
-                
-                left_context = ' '.join(words[context_start:start_word])
-                keyword = ' '.join(words[start_word:end_word + 1])
-                right_context = ' '.join(words[end_word + 1:context_end])
-                
-                result['left_context'] = left_context
-                result['keyword'] = keyword
-                result['right_context'] = right_context
+            result['left_context'] = ' '.join(left.split()[-context_words:]) if context_words > 0 else ''
+            result['keyword'] = keyword
+            result['right_context'] = ' '.join(right.split()[:max(context_words, 0)])
         
         return results
     
@@ -386,11 +518,38 @@ class TranscriptDB:
         self.close()
 
 
+_DATE_PREFIX_RE = re.compile(r'^\d{4}-\d{2}-\d{2}-')
+_TRAILING_NUMBER_RE = re.compile(r'\b\d+\b$')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=512)
+def _title_from_filename(filename: str) -> str:
+    """Build a title from a filename (pure, so cached per filename)."""
+    # Remove common prefixes and clean up
+    title = filename
+    
+    # Handle date patterns like "2025-07-28-"
+    title = _DATE_PREFIX_RE.sub('', title)
+    
+    # Replace hyphens and underscores with spaces
+    title = title.replace('-', ' ').replace('_', ' ')
+    
+    # Capitalize words
+    title = ' '.join(word.capitalize() for word in title.split())
+    
+    # Clean up common patterns
+    title = _TRAILING_NUMBER_RE.sub('', title).strip()  # Remove trailing numbers
+    title = _WHITESPACE_RE.sub(' ', title)  # Multiple spaces to single
+    
+    return title or filename
+
+
 def format_time(seconds: float) -> str:
     """Format seconds as HH:MM:SS."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = int(seconds % 60)
+    # One float->int conversion, then integer divmod only
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
     return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
 
@@ -400,14 +559,17 @@ def print_search_results(results: List[Dict[str, Any]], query: str):
         print(f"No results found for '{query}'")
         return
     
-    print(f"\n🔍 Found {len(results)} results for '{query}':\n")
+    # Collect every line and write once instead of one print() per line
+    lines = [f"\n🔍 Found {len(results)} results for '{query}':\n\n"]
     
     for i, result in enumerate(results, 1):
-        print(f"[{i:2d}] {result['title']} ({result['filename']})")
-        print(f"     Speaker: {result['speaker'] or 'Unknown'} | "
-              f"Time: {format_time(result['start_time'])}-{format_time(result['end_time'])}")
-        print(f"     {result['snippet'] or result['text'][:100]}...")
-        print()
+        lines.append(f"[{i:2d}] {result['title']} ({result['filename']})\n")
+        lines.append(f"     Speaker: {result['speaker'] or 'Unknown'} | "
+                     f"Time: {format_time(result['start_time'])}-{format_time(result['end_time'])}\n")
+        lines.append(f"     {result['snippet'] or result['text'][:100]}...\n\n")
+    
+    sys.stdout.write(''.join(lines))
+    sys.stdout.flush()
 
 
 def print_kwic_results(results: List[Dict[str, Any]], query: str):
@@ -416,16 +578,18 @@ def print_kwic_results(results: List[Dict[str, Any]], query: str):
         print(f"No results found for '{query}'")
         return
     
-    print(f"\n🎯 KWIC results for '{query}':\n")
+    lines = [f"\n🎯 KWIC results for '{query}':\n\n"]
     
     for i, result in enumerate(results, 1):
-        print(f"[{i:2d}] {result['title']} - {result['speaker'] or 'Unknown'} "
-              f"@ {format_time(result['start_time'])}")
+        lines.append(f"[{i:2d}] {result['title']} - {result['speaker'] or 'Unknown'} "
+                     f"@ {format_time(result['start_time'])}\n")
         
         if 'left_context' in result:
-            print(f"     ...{result['left_context']} "
-                  f"**{result['keyword']}** "
-                  f"{result['right_context']}...")
+            lines.append(f"     ...{result['left_context']} "
+                         f"**{result['keyword']}** "
+                         f"{result['right_context']}...\n\n")
         else:
-            print(f"     {result['text'][:100]}...")
-        print()
+            lines.append(f"     {result['text'][:100]}...\n\n")
+    
+    sys.stdout.write(''.join(lines))
+    sys.stdout.flush()
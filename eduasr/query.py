@@ -6,21 +6,12 @@ def open_db(path):
   conn.row_factory = sqlite3.Row
   return conn
 
-def kwic(conn, query, window=40, limit=100):
-  sql = "SELECT s.id, s.file, s.speaker, s.start_s, s.end_s, s.text FROM segments s JOIN segments_fts f ON s.id=f.rowid WHERE segments_fts MATCH ? LIMIT ?"
-  rows = conn.execute(sql, (query, limit)).fetchall()
-  out = []
-  for r in rows:
-    text = r["text"]
-    q = query.strip('"').lower()
-    idx = text.lower().find(q)
-    if idx >= 0:
-      left = max(0, idx-window); right = min(len(text), idx+len(q)+window)
-      snippet = text[left:right]
-      out.append(f"{r['file']} [{r['start_s']:.1f}-{r['end_s']:.1f}] {r['speaker'] or 'UNK'} :: …{snippet}…")
-    else:
-      out.append(f"{r['file']} [{r['start_s']:.1f}-{r['end_s']:.1f}] {r['speaker'] or 'UNK'} :: {text[:2*window]}…")
-  return out
+def kwic(conn, query, window_tokens=16, limit=100):
+  # FTS5 already knows the match offsets; snippet() cuts the window (at most 64 tokens) in SQLite
+  sql = ("SELECT s.file, s.speaker, s.start_s, s.end_s, snippet(segments_fts, 0, '«', '»', '…', ?) AS snip "
+         "FROM segments_fts JOIN segments s ON s.id=segments_fts.rowid WHERE segments_fts MATCH ? LIMIT ?")
+  rows = conn.execute(sql, (min(window_tokens, 64), query, limit)).fetchall()
+  return [f"{r['file']} [{r['start_s']:.1f}-{r['end_s']:.1f}] {r['speaker'] or 'UNK'} :: {r['snip']}" for r in rows]
 
 def hits(conn, query, group_by="file"):
   group_col = "file" if group_by=="file" else "speaker"
@@ -29,8 +20,8 @@ def hits(conn, query, group_by="file"):
 
 def segments(conn, query, limit=200):
   sql = "SELECT s.file, s.speaker, s.start_s, s.end_s, s.text FROM segments s JOIN segments_fts f ON s.id=f.rowid WHERE segments_fts MATCH ? ORDER BY s.file, s.start_s LIMIT ?"
-  rows = conn.execute(sql, (query, limit)).fetchall()
-  return rows
+  # Return the cursor so callers stream rows instead of holding the whole result
+  return conn.execute(sql, (query, limit))
 
 def write_segments_csv(rows, csv_path):
   with open(csv_path, "w", newline="", encoding="utf-8") as f:
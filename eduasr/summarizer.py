@@ -7,6 +7,8 @@ from pathlib import Path
 from typing import Dict, Any, List, Optional
 import time
 
+from .db import load_json_file
+
 
 class LMStudioSummarizer:
     """Summarizer that uses LM Studio for generating transcript summaries."""
@@ -112,8 +114,7 @@ Summary:
     def summarize_transcript(self, json_file: Path) -> Optional[Dict[str, Any]]:
         """Summarize a single transcript JSON file."""
         try:
-            with open(json_file, 'r') as f:
-                data = json.load(f)
+            data = load_json_file(json_file)
             
             segments = data.get('segments', [])
             if not segments:
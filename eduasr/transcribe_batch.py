@@ -2,32 +2,175 @@
 """Batch transcription pipeline using WhisperX."""
 
 import argparse
-import csv
+import copy
+import hashlib
 import json
+import logging
+import logging.handlers
 import os
 import shutil
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import yaml
+except ImportError:  # load_config falls back to an empty config
+    yaml = None
+
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedLogHandler(logging.handlers.MemoryHandler):
+    """MemoryHandler that also flushes every ``flush_interval_s`` seconds.
+
+    Progress messages are batched into a single write instead of one write per
+    line, while errors come out immediately. A daemon thread flushes whatever
+    is buffered on the interval, so a message is never held back until the
+    next record arrives (which can be a whole ASR pass later).
+    """
+
+    def __init__(self, capacity: int = 1024, flush_interval_s: float = 5.0, target: Optional[logging.Handler] = None):
+        super().__init__(capacity, flushLevel=logging.ERROR, target=target)
+        self.flush_interval_s = flush_interval_s
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, name='log-flush', daemon=True)
+        self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval_s):
+            if self.buffer:
+                self.flush()
+
+    def close(self):
+        self._stop.set()
+        super().close()
+
+
+def flush_logs():
+    """Write out anything the ``eduasr`` log handlers are holding."""
+    for handler in logging.getLogger('eduasr').handlers:
+        handler.flush()
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler bound to whatever ``sys.stdout`` is when a record is written.
+
+    The buffered handler can outlive a redirected stdout (e.g. under pytest's
+    capture), so the stream is looked up at emit time rather than stored.
+    """
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+
+def configure_logging(level: int = logging.INFO):
+    """Attach a buffered stdout handler to the ``eduasr`` logger (idempotent)."""
+    root = logging.getLogger('eduasr')
+    if any(isinstance(h, BufferedLogHandler) for h in root.handlers):
+        return
+    stream = _StdoutHandler()
+    stream.setFormatter(logging.Formatter('%(message)s'))
+    root.addHandler(BufferedLogHandler(target=stream))
+    root.setLevel(level)
+
 
 def load_config(config_path: str) -> Dict[str, Any]:
-    """Load configuration from YAML file."""
-    try:
-        import yaml
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
-    except ImportError:
-        print("Warning: pyyaml not installed, using default config")
+    """Load configuration from YAML file.
+
+    Parsed files are cached by path and modification time, so repeated loads
+    of an unchanged file skip the YAML parse. Each call returns its own copy.
+    """
+    if yaml is None:
+        logger.warning("Warning: pyyaml not installed, using default config")
         return {}
+    mtime_ns = os.stat(config_path).st_mtime_ns
+    return copy.deepcopy(_load_config_cached(os.path.abspath(config_path), mtime_ns))
+
+
+@lru_cache(maxsize=32)
+def _load_config_cached(config_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a YAML config file; ``mtime_ns`` is only part of the cache key."""
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+# Per-device batch size when config.yaml leaves it unset; compute_type is
+# chosen per device by pick_compute()
+DEFAULT_BATCH_SIZE = {'cuda': 16}
+
+# Files shorter than this (seconds) use short_model_size when it is configured
+SHORT_FILE_MAX_S = 120.0
+
+# whisperx.load_audio decodes to 16 kHz mono float32
+SAMPLE_RATE = 16000
+
+# Threads listing directories concurrently in find_local_files
+DEFAULT_STAT_THREADS = 8
+
+# RAM-backed filesystem used by --scratch_tmpfs
+TMPFS_ROOT = '/dev/shm'
+
+# Seconds a cached free-space reading stays valid inside the transcription loop
+DISK_CACHE_TTL_S = 10.0
+# Files larger than this (in MB) force a fresh free-space reading on the next check
+DISK_RECHECK_MIN_MB = 100.0
+
+# Speaker assignment works in integer microseconds; times past MAX_TIME_S
+# (e.g. an open-ended turn) are capped there
+US_PER_S = 1_000_000
+MAX_TIME_S = 1e9
+
+# Largest segments x speaker-turns overlap matrix computed in one shot; longer
+# recordings fall back to per-segment searchsorted lookups
+DENSE_OVERLAP_MAX_CELLS = 10_000_000
+
+
+class _DiskCache:
+    """Remember the last free-space reading so repeated checks skip the statvfs call."""
+
+    __slots__ = ('path', 't', 'gb')
+
+    def __init__(self):
+        self.path = None
+        self.t = float('-inf')
+        self.gb = 0.0
 
+    def get(self, path: str, ttl: float = DISK_CACHE_TTL_S) -> float:
+        now = time.monotonic()
+        if path == self.path and now - self.t < ttl:
+            return self.gb
+        self.gb = shutil.disk_usage(path).free / (1024**3)
+        self.path = path
+        self.t = now
+        return self.gb
 
-def get_disk_free_gb(path: str) -> float:
-    """Get free disk space in GB for the given path."""
-    stat = shutil.disk_usage(path)
-    return stat.free / (1024**3)
+
+_disk_cache = _DiskCache()
+
+
+def get_disk_free_gb(path: str, max_age_s: float = 0.0) -> float:
+    """Get free disk space in GB for the given path.
+
+    A reading younger than ``max_age_s`` seconds is reused instead of querying
+    the filesystem again; the default of 0 always takes a fresh reading.
+    """
+    return _disk_cache.get(path, ttl=max_age_s)
 
 
 def wait_for_disk_space(scratch_dir: str, min_free_gb: float, check_interval_s: int = 30, max_wait_min: int = 60):
@@ -40,36 +183,41 @@ def wait_for_disk_space(scratch_dir: str, min_free_gb: float, check_interval_s:
         if free_gb >= min_free_gb:
             return
         
-        print(f"Insufficient disk space: {free_gb:.1f}GB available, {min_free_gb}GB required. Waiting...")
+        logger.warning(f"Insufficient disk space: {free_gb:.1f}GB available, {min_free_gb}GB required. Waiting...")
         time.sleep(check_interval_s)
         waited_seconds += check_interval_s
     
     raise RuntimeError(f"Insufficient disk space after waiting {max_wait_min} minutes")
 
 
+@lru_cache(maxsize=None)
+def parse_extensions(include_ext: str) -> frozenset:
+    """Normalize a comma-separated extension list to a set of lowercase '.ext' strings."""
+    extensions = set()
+    for ext in include_ext.split(','):
+        ext = ext.strip().lower()
+        if ext:
+            extensions.add(ext if ext.startswith('.') else '.' + ext)
+    return frozenset(extensions)
+
+
+@lru_cache(maxsize=None)
+def rclone_filter_args(include_ext: str) -> tuple:
+    """Build rclone filter flags matching the extensions in any letter case."""
+    names = ','.join(sorted(ext[1:] for ext in parse_extensions(include_ext)))
+    return ('--filter', f'+ *.{{{names}}}', '--filter', '- *', '--ignore-case')
+
+
 def list_remote_files(rclone_remote: str, remote_path: str, include_ext: str) -> List[str]:
     """List files on remote that match the extension filter."""
-    # Convert include_ext to rclone include filters (case-insensitive)
-    extensions = [ext.strip().lower() for ext in include_ext.split(',')]
-    include_filters = []
-    for ext in extensions:
-        if not ext.startswith('.'):
-            ext = '.' + ext
-        # Add both lowercase and uppercase variants for rclone
-        include_filters.extend(['--include', f'*{ext}'])
-        include_filters.extend(['--include', f'*{ext.upper()}'])
-        # Also add common mixed case variants
-        if len(ext) > 1:
-            include_filters.extend(['--include', f'*{ext[0].upper() + ext[1:].lower()}'])
-    
-    cmd = ['rclone', 'lsf', f'{rclone_remote}:{remote_path}', '--recursive'] + include_filters
-    
-    print(f"Listing files from {rclone_remote}:{remote_path}")
-    print(f"Extensions to match (case-insensitive): {', '.join(extensions)}")
+    cmd = ['rclone', 'lsf', f'{rclone_remote}:{remote_path}', '--recursive', *rclone_filter_args(include_ext)]
+    
+    logger.info(f"Listing files from {rclone_remote}:{remote_path}")
+    logger.info(f"Extensions to match (case-insensitive): {', '.join(sorted(parse_extensions(include_ext)))}")
     result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode != 0:
-        print(f"Warning: rclone list failed: {result.stderr}")
+        logger.warning(f"Warning: rclone list failed: {result.stderr}")
         return []
     
     # Parse the file list
@@ -86,13 +234,15 @@ def sync_single_file(rclone_remote: str, remote_file_path: str, local_dir: str)
     filename = Path(remote_file_path).name
     local_file_path = local_path / filename
     
-    cmd = ['rclone', 'copyto', f'{rclone_remote}:{remote_file_path}', str(local_file_path)]
+    # Split large media across several parallel ranged reads
+    cmd = ['rclone', 'copyto', f'{rclone_remote}:{remote_file_path}', str(local_file_path),
+           '--multi-thread-streams', '4', '--multi-thread-cutoff', '64M', '--buffer-size', '64M']
     
-    print(f"Syncing {remote_file_path} to {local_file_path}")
+    logger.info(f"Syncing {remote_file_path} to {local_file_path}")
     result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode != 0:
-        print(f"Warning: rclone failed to sync {remote_file_path}: {result.stderr}")
+        logger.warning(f"Warning: rclone failed to sync {remote_file_path}: {result.stderr}")
         return None
     
     return str(local_file_path)
@@ -103,49 +253,169 @@ def sync_from_remote(rclone_remote: str, remote_path: str, local_dir: str, inclu
     return list_remote_files(rclone_remote, remote_path, include_ext)
 
 
-def find_local_files(input_dir: str, include_ext: str) -> List[str]:
-    """Find local files matching the extension filter (case-insensitive)."""
-    extensions = [ext.strip().lower() for ext in include_ext.split(',')]
-    print(f"Extensions to match (case-insensitive): {', '.join(extensions)}")
-    input_path = Path(input_dir)
-    files = []
+class RemoteBackend:
+    """Lists and downloads audio files from a remote store."""
     
-    # Get all files and filter by extension case-insensitively
-    all_files = list(input_path.glob('**/*'))
+    description = "remote"
     
-    for file_path in all_files:
-        if file_path.is_file():
-            file_ext = file_path.suffix.lower()
-            for ext in extensions:
-                if not ext.startswith('.'):
-                    ext = '.' + ext
-                if file_ext == ext:
-                    files.append(file_path)
-                    break
+    def list(self, include_ext: str) -> List[str]:
+        """Return remote paths, relative to the backend root, matching ``include_ext``."""
+        raise NotImplementedError
     
-    return [str(f) for f in files]
+    def download(self, remote_file: str, local_dir: str) -> Optional[str]:
+        """Download ``remote_file`` into ``local_dir`` and return the local path."""
+        raise NotImplementedError
 
 
-def is_already_processed(audio_file: str, output_dir: str) -> bool:
-    """Check if file has already been processed."""
-    audio_path = Path(audio_file)
-    done_file = Path(output_dir) / f"{audio_path.stem}.done"
-    return done_file.exists()
+class RcloneBackend(RemoteBackend):
+    """Remote access through the rclone CLI (any rclone-supported store)."""
+    
+    def __init__(self, rclone_remote: str, remote_path: str):
+        self.rclone_remote = rclone_remote
+        self.remote_path = remote_path
+        self.description = f"{rclone_remote}:{remote_path}"
+    
+    def list(self, include_ext: str) -> List[str]:
+        return list_remote_files(self.rclone_remote, self.remote_path, include_ext)
+    
+    def download(self, remote_file: str, local_dir: str) -> Optional[str]:
+        return sync_single_file(self.rclone_remote, f"{self.remote_path}/{remote_file}", local_dir)
 
 
-def is_already_processed_remote(remote_file_path: str, output_dir: str) -> bool:
-    """Check if remote file has already been processed."""
-    filename = Path(remote_file_path).name
-    audio_path = Path(filename)
-    done_file = Path(output_dir) / f"{audio_path.stem}.done"
-    return done_file.exists()
+class S3Backend(RemoteBackend):
+    """Direct S3 access via boto3, skipping the rclone subprocess per call."""
+    
+    def __init__(self, url: str, concurrency: int = 8, chunk_mb: int = 64):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as e:
+            raise ImportError(f"boto3 is required for s3:// backends (pip install boto3): {e}")
+        
+        bucket_and_prefix = url[len("s3://"):] if url.startswith("s3://") else url
+        bucket, _, prefix = bucket_and_prefix.partition('/')
+        if not bucket:
+            raise ValueError(f"Invalid S3 URL: {url}")
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/') + '/' if prefix else ''
+        self.description = f"s3://{bucket}/{self.prefix}"
+        self.client = boto3.client('s3')
+        chunk_size = chunk_mb * 1024 * 1024
+        self.transfer_config = TransferConfig(
+            multipart_threshold=chunk_size,
+            multipart_chunksize=chunk_size,
+            max_concurrency=concurrency,
+        )
+    
+    def list(self, include_ext: str) -> List[str]:
+        extensions = tuple(parse_extensions(include_ext))
+        logger.info(f"Listing files from {self.description}")
+        logger.info(f"Extensions to match (case-insensitive): {', '.join(extensions)}")
+        
+        files = []
+        paginator = self.client.get_paginator('list_objects_v2')
+        try:
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+                for obj in page.get('Contents', []):
+                    key = obj['Key']
+                    if key.lower().endswith(extensions):
+                        files.append(key[len(self.prefix):])
+        except Exception as e:
+            logger.warning(f"Warning: S3 list failed: {e}")
+            return []
+        return files
+    
+    def download(self, remote_file: str, local_dir: str) -> Optional[str]:
+        local_path = Path(local_dir)
+        local_path.mkdir(parents=True, exist_ok=True)
+        local_file_path = local_path / Path(remote_file).name
+        
+        logger.info(f"Downloading s3://{self.bucket}/{self.prefix}{remote_file} to {local_file_path}")
+        try:
+            self.client.download_file(self.bucket, self.prefix + remote_file, str(local_file_path),
+                                      Config=self.transfer_config)
+        except Exception as e:
+            logger.warning(f"Warning: S3 download failed for {remote_file}: {e}")
+            return None
+        return str(local_file_path)
 
 
-def mark_as_processed(audio_file: str, output_dir: str):
-    """Mark file as processed by creating a .done file."""
-    audio_path = Path(audio_file)
-    done_file = Path(output_dir) / f"{audio_path.stem}.done"
-    done_file.touch()
+def make_backend(args, config: Dict[str, Any]) -> Optional[RemoteBackend]:
+    """Pick the remote backend from the command line, or None for local input."""
+    backend = getattr(args, 'backend', None)
+    if backend:
+        if not backend.startswith('s3://'):
+            raise ValueError(f"Unsupported --backend {backend!r}; expected s3://bucket/prefix")
+        return S3Backend(backend, concurrency=config.get('s3_concurrency', 8))
+    if args.rclone_remote and args.remote_path:
+        return RcloneBackend(args.rclone_remote, args.remote_path)
+    return None
+
+
+def _scan_dir(path: str, extensions: frozenset) -> tuple:
+    """List one directory, returning (matching files, subdirectories)."""
+    files, subdirs = [], []
+    splitext = os.path.splitext
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                elif splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                    files.append(entry.path)
+    except OSError:
+        # Unreadable or vanished directories are skipped, as glob does
+        pass
+    return files, subdirs
+
+
+def find_local_files(input_dir: str, include_ext: str, stat_threads: int = DEFAULT_STAT_THREADS) -> List[str]:
+    """Find local files matching the extension filter (case-insensitive).
+    
+    The tree is walked breadth-first with each level's directories listed on
+    ``stat_threads`` threads, which hides per-directory latency on network
+    filesystems.
+    """
+    extensions = parse_extensions(include_ext)
+    logger.info(f"Extensions to match (case-insensitive): {', '.join(sorted(extensions))}")
+    
+    found = []
+    pending = [input_dir]
+    with ThreadPoolExecutor(max_workers=max(1, stat_threads), thread_name_prefix='scandir') as pool:
+        while pending:
+            next_level = []
+            for files, subdirs in pool.map(_scan_dir, pending, [extensions] * len(pending)):
+                found.extend(files)
+                next_level.extend(subdirs)
+            pending = next_level
+    return found
+
+
+def scan_done_set(output_dir: str) -> set:
+    """Return the stems of every file that already has a done marker.
+    
+    The JSON output is written last and atomically, so its presence is the
+    "done" marker; with ``write_json: false`` an empty ``.done`` file is
+    written instead. One directory listing replaces a stat per input file.
+    """
+    try:
+        names = os.listdir(output_dir)
+    except FileNotFoundError:
+        return set()
+    return {name[:-5] for name in names if name.endswith(('.json', '.done'))}
+
+
+def is_already_processed(audio_file: str, output_dir: str, done_set: Optional[set] = None) -> bool:
+    """Check if a local or remote file has already been processed.
+    
+    Pass ``done_set`` from scan_done_set() to check many files against one
+    directory listing instead of a stat per file.
+    """
+    stem = Path(audio_file).stem
+    if done_set is not None:
+        return stem in done_set
+    output_path = Path(output_dir)
+    return (output_path / f"{stem}.json").exists() or (output_path / f"{stem}.done").exists()
 
 
 def get_hf_token(config: Dict[str, Any]) -> Optional[str]:
@@ -189,7 +459,7 @@ def load_diarization_model(config: Dict[str, Any], device: str = "cpu"):
         if not hf_token:
             raise ValueError("Hugging Face token required for diarization. Set HF_TOKEN environment variable or save token to ~/.eduasr/hf_token")
         
-        print("Loading diarization model...")
+        logger.info("Loading diarization model...")
         diarization_pipeline = Pipeline.from_pretrained(
             "pyannote/speaker-diarization-3.1",
             use_auth_token=hf_token
@@ -200,9 +470,17 @@ def load_diarization_model(config: Dict[str, Any], device: str = "cpu"):
             try:
                 diarization_pipeline = diarization_pipeline.to(device)
             except Exception as e:
-                print(f"Warning: Could not move diarization model to {device}, using CPU: {e}")
+                logger.warning(f"Warning: Could not move diarization model to {device}, using CPU: {e}")
                 device = "cpu"
         
+        # Opt-in fp16 autocast for the embedding model; pooling stays in fp32
+        if config.get('embedding_precision') in ('fp16', 'float16') and device.startswith('cuda'):
+            if hasattr(diarization_pipeline, '_embedding_precision'):
+                import torch
+                diarization_pipeline._embedding_precision = torch.float16
+            else:
+                logger.warning("Warning: This pyannote version has no fp16 embedding option; using fp32")
+        
         return diarization_pipeline
         
     except ImportError as e:
@@ -211,27 +489,94 @@ def load_diarization_model(config: Dict[str, Any], device: str = "cpu"):
         raise RuntimeError(f"Failed to load diarization model: {e}")
 
 
-def perform_diarization(audio_file: str, diarization_pipeline, config: Dict[str, Any]) -> Dict[str, Any]:
-    """Perform speaker diarization on audio file."""
+def _diarization_cache_path(audio_file: str, cache_dir: Optional[str]) -> Optional[Path]:
+    """Cache file for ``audio_file``'s speaker turns, keyed by a hash of its bytes."""
+    if not cache_dir:
+        return None
+    digest = hashlib.blake2b(digest_size=8)
+    with open(audio_file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return Path(cache_dir).expanduser() / f"{digest.hexdigest()}.diar.npz"
+
+
+def _load_cached_diarization(cache_file: Path) -> Optional[List[Dict]]:
+    """Read speaker turns saved by _save_cached_diarization, or None if unusable."""
+    import numpy as np
+    
     try:
-        print("Performing speaker diarization...")
-        
-        # Run diarization
-        diarization = diarization_pipeline(audio_file)
-        
-        # Convert to list of speaker segments
-        speaker_segments = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            speaker_segments.append({
-                'start': turn.start,
-                'end': turn.end,
-                'speaker': speaker
-            })
+        with np.load(cache_file) as cached:
+            return [{'start': start, 'end': end, 'speaker': speaker}
+                    for start, end, speaker in zip((cached['starts_us'] / US_PER_S).tolist(),
+                                                   (cached['ends_us'] / US_PER_S).tolist(),
+                                                   cached['speakers'].tolist())]
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning(f"Warning: Ignoring unreadable diarization cache {cache_file}: {e}")
+        return None
+
+
+def _save_cached_diarization(cache_file: Path, speaker_segments: List[Dict]):
+    """Save speaker turns as compressed numpy arrays (written to a temp file, then renamed)."""
+    import numpy as np
+    
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    starts, ends = _segments_to_arrays(speaker_segments)
+    tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+    with open(tmp_file, 'wb') as f:
+        np.savez_compressed(f, starts_us=starts, ends_us=ends,
+                            speakers=np.array([seg['speaker'] for seg in speaker_segments], dtype=str))
+    os.replace(tmp_file, cache_file)
+
+
+def perform_diarization(audio_file: str, diarization_pipeline, config: Dict[str, Any], audio=None) -> Dict[str, Any]:
+    """Perform speaker diarization on audio file.
+    
+    ``audio`` is the already-decoded 16 kHz waveform; when given, pyannote
+    works on it in memory instead of re-reading and resampling the file.
+    With ``diarization_cache`` set in the config, speaker turns are stored in
+    that directory and reused the next time the same audio is diarized.
+    ``max_speaker_count: 1`` skips pyannote and labels everything SPEAKER_00.
+    """
+    if config.get('max_speaker_count') == 1:
+        # Nothing to cluster, so segmentation and embeddings would be wasted work
+        end = len(audio) / SAMPLE_RATE if audio is not None else float('inf')
+        return {'segments': [{'start': 0.0, 'end': end, 'speaker': 'SPEAKER_00'}], 'speakers': ['SPEAKER_00']}
+    
+    try:
+        cache_file = _diarization_cache_path(audio_file, config.get('diarization_cache'))
+        speaker_segments = _load_cached_diarization(cache_file) if cache_file and cache_file.exists() else None
+        if speaker_segments is not None:
+            logger.info("Using cached speaker diarization...")
+        else:
+            logger.info("Performing speaker diarization...")
+            
+            # Run diarization
+            if audio is not None:
+                import torch
+                diarization = diarization_pipeline({'waveform': torch.from_numpy(audio[None, :]),
+                                                    'sample_rate': SAMPLE_RATE})
+            else:
+                diarization = diarization_pipeline(audio_file)
+            
+            # Convert to list of speaker segments
+            speaker_segments = []
+            for turn, _, speaker in diarization.itertracks(yield_label=True):
+                speaker_segments.append({
+                    'start': turn.start,
+                    'end': turn.end,
+                    'speaker': speaker
+                })
+            
+            if cache_file:
+                try:
+                    _save_cached_diarization(cache_file, speaker_segments)
+                except OSError as e:
+                    logger.warning(f"Warning: Could not write diarization cache: {e}")
         
         # Sort by start time
         speaker_segments.sort(key=lambda x: x['start'])
         
-        print(f"Found {len(set(seg['speaker'] for seg in speaker_segments))} speakers")
+        logger.info(f"Found {len(set(seg['speaker'] for seg in speaker_segments))} speakers")
         
         return {
             'segments': speaker_segments,
@@ -239,89 +584,441 @@ def perform_diarization(audio_file: str, diarization_pipeline, config: Dict[str,
         }
         
     except Exception as e:
-        print(f"Warning: Diarization failed: {e}")
+        logger.warning(f"Warning: Diarization failed: {e}")
         return {'segments': [], 'speakers': []}
 
 
-def assign_speakers_to_segments(transcription_segments: List[Dict], speaker_segments: List[Dict]) -> List[Dict]:
-    """Assign speakers to transcription segments based on temporal overlap."""
-    result_segments = []
+def _to_us(seconds):
+    """Convert seconds (a float or float array) to int64 microseconds.
+    
+    Unbounded times (``inf``) are capped so interval arithmetic cannot overflow.
+    """
+    import numpy as np
+    
+    return np.rint(np.minimum(seconds, MAX_TIME_S) * US_PER_S).astype(np.int64)
+
+
+def _segments_to_arrays(segments: List[Dict]):
+    """Return the ``start`` and ``end`` times of ``segments`` as int64 microsecond arrays."""
+    import numpy as np
+    
+    starts = np.fromiter((seg['start'] for seg in segments), dtype=np.float64, count=len(segments))
+    ends = np.fromiter((seg['end'] for seg in segments), dtype=np.float64, count=len(segments))
+    return _to_us(starts), _to_us(ends)
+
+
+@lru_cache(maxsize=None)
+def _compiled_best_ids():
+    """Compile the long-input speaker assignment loop with numba, or return None.
     
-    for trans_seg in transcription_segments:
-        trans_start = trans_seg['start']
-        trans_end = trans_seg['end']
-        trans_mid = (trans_start + trans_end) / 2
+    numba is optional; without it SpeakerIntervals loops over windows in Python.
+    """
+    try:
+        import numba
+    except ImportError:
+        return None
+    import numpy as np
+    
+    @numba.njit(cache=True)
+    def best_ids(starts, ends, turn_starts, turn_ends, turn_max_ends, turn_ids, n_labels):
+        out = np.empty(starts.size, np.intp)
+        totals = np.zeros(n_labels, np.int64)
+        for i in range(starts.size):
+            lo = np.searchsorted(turn_max_ends, starts[i], side='right')
+            hi = np.searchsorted(turn_starts, ends[i], side='left')
+            totals[:] = 0
+            for j in range(lo, hi):
+                overlap = min(turn_ends[j], ends[i]) - max(turn_starts[j], starts[i])
+                if overlap > 0:
+                    totals[turn_ids[j]] += overlap
+            best = totals.argmax()
+            out[i] = best if totals[best] > 0 else -1
+        return out
+    
+    return best_ids
+
+
+class SpeakerIntervals:
+    """Speaker turns sorted by start time for overlap lookups.
+    
+    ``np.searchsorted`` bounds the turns that can overlap a query window, so a
+    lookup costs O(log M) plus the handful of turns actually overlapping it.
+    """
+    
+    def __init__(self, speaker_segments: List[Dict]):
+        import numpy as np
         
-        # Find the speaker segment that contains the midpoint of the transcription segment
-        assigned_speaker = "SPEAKER_UNKNOWN"
-        best_overlap = 0
+        turns = sorted(speaker_segments, key=lambda seg: seg['start'])
+        label_ids: Dict[str, int] = {}
+        for seg in turns:
+            label_ids.setdefault(seg['speaker'], len(label_ids))
+        self.labels = list(label_ids)
+        # Integer microseconds: exact comparisons and overlap sums
+        self.starts, self.ends = _segments_to_arrays(turns)
+        self.ids = np.array([label_ids[seg['speaker']] for seg in turns], dtype=np.intp)
+        # Running maximum of end times; monotone, so it can be searched too
+        self.max_ends = np.maximum.accumulate(self.ends) if turns else self.ends
+    
+    def best_speaker_ids(self, starts, ends):
+        """Return the best speaker index for each window, or -1 where none overlaps.
         
-        for speaker_seg in speaker_segments:
-            speaker_start = speaker_seg['start']
-            speaker_end = speaker_seg['end']
-            
-            # Calculate overlap
-            overlap_start = max(trans_start, speaker_start)
-            overlap_end = min(trans_end, speaker_end)
-            overlap_duration = max(0, overlap_end - overlap_start)
-            
-            if overlap_duration > best_overlap:
-                best_overlap = overlap_duration
-                assigned_speaker = speaker_seg['speaker']
+        ``starts`` and ``ends`` are int64 microseconds, as returned by
+        _segments_to_arrays(). Small inputs build the full windows x turns
+        overlap matrix with broadcasting; larger ones query window by window,
+        in a numba-compiled loop when numba is installed.
+        """
+        import numpy as np
+        
+        n_windows, n_labels = len(starts), len(self.labels)
+        if n_labels == 0:
+            return np.full(n_windows, -1, dtype=np.intp)
+        if n_windows * len(self.starts) <= DENSE_OVERLAP_MAX_CELLS:
+            overlap = np.clip(np.minimum(ends[:, None], self.ends[None, :])
+                              - np.maximum(starts[:, None], self.starts[None, :]), 0, None)
+            # Sum each speaker's columns: (windows x turns) @ (turns x speakers)
+            totals = overlap @ np.eye(n_labels)[self.ids]
+            best = totals.argmax(axis=1)
+            best[totals[np.arange(n_windows), best] <= 0] = -1
+            return best
+        kernel = _compiled_best_ids()
+        if kernel is not None:
+            return kernel(starts, ends, self.starts, self.ends, self.max_ends, self.ids, n_labels)
+        return np.array([self._best_id(s, e) for s, e in zip(starts, ends)], dtype=np.intp)
+    
+    def best_speaker(self, start: float, end: float) -> Optional[str]:
+        """Return the speaker with the most total overlap with [start, end] seconds, or None."""
+        best = self._best_id(_to_us(start), _to_us(end))
+        return self.labels[best] if best >= 0 else None
+    
+    def _best_id(self, start, end) -> int:
+        """best_speaker() on microsecond bounds, returning a label index or -1."""
+        import numpy as np
         
+        # Turns from lo on can end after `start`; turns before hi start before `end`
+        lo = np.searchsorted(self.max_ends, start, side='right')
+        hi = np.searchsorted(self.starts, end, side='left')
+        if lo >= hi:
+            return -1
+        overlap = np.minimum(self.ends[lo:hi], end) - np.maximum(self.starts[lo:hi], start)
+        totals = np.bincount(self.ids[lo:hi], weights=np.clip(overlap, 0, None), minlength=len(self.labels))
+        best = int(totals.argmax())
+        return best if totals[best] > 0 else -1
+
+
+def assign_speakers_to_segments(transcription_segments: List[Dict], speaker_segments: List[Dict]) -> List[Dict]:
+    """Assign speakers to transcription segments based on temporal overlap.
+    
+    Each segment gets the speaker whose turns overlap it the longest, or
+    SPEAKER_UNKNOWN when no turn overlaps it.
+    """
+    intervals = SpeakerIntervals(speaker_segments)
+    best_ids = intervals.best_speaker_ids(*_segments_to_arrays(transcription_segments))
+    labels = intervals.labels + ["SPEAKER_UNKNOWN"]  # index -1 for no overlap
+    result_segments = []
+    
+    for trans_seg, best in zip(transcription_segments, best_ids.tolist()):
         # Create new segment with speaker information
         new_segment = trans_seg.copy()
-        new_segment['speaker'] = assigned_speaker
+        new_segment['speaker'] = labels[best]
         result_segments.append(new_segment)
     
     return result_segments
 
 
-def transcribe_file(audio_file: str, output_dir: str, config: Dict[str, Any], model, model_a=None, metadata=None, diarization_pipeline=None) -> Dict[str, Any]:
-    """Transcribe a single audio file."""
+def probe_duration(audio_file: str) -> Optional[float]:
+    """Read the media duration in seconds from container metadata via ffprobe.
+    
+    Returns None when ffprobe is unavailable or the file has no duration.
+    """
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+           '-of', 'default=nokey=1:noprint_wrappers=1', str(audio_file)]
+    try:
+        out = subprocess.check_output(cmd, stderr=subprocess.DEVNULL)
+        return float(out)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+_probe_executor: Optional[ThreadPoolExecutor] = None
+
+
+def probe_duration_async(audio_file: str):
+    """Start probe_duration on a background thread and return its Future."""
+    global _probe_executor
+    if _probe_executor is None:
+        _probe_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ffprobe')
+    return _probe_executor.submit(probe_duration, audio_file)
+
+
+def default_batch_size(device: str) -> int:
+    """Batch size for ``device`` when config.yaml leaves it unset ("cuda:1" counts as "cuda")."""
+    return DEFAULT_BATCH_SIZE.get(device.partition(':')[0], 8)
+
+
+def pick_compute(device: str) -> str:
+    """Choose a CTranslate2 compute type from the GPU's compute capability.
+    
+    Ampere and newer run float16 at full speed; Turing gets int8 weights with
+    float16 activations; CPUs and older GPUs use int8.
+    """
+    asr_device, _, index = device.partition(':')
+    if asr_device != 'cuda':
+        return 'int8'
+    try:
+        import torch
+        capability = torch.cuda.get_device_capability(int(index or 0))
+    except Exception:
+        return 'float16'
+    if capability >= (8, 0):
+        return 'float16'
+    if capability >= (7, 5):
+        return 'int8_float16'
+    return 'int8'
+
+
+def pick_model(duration_s: Optional[float], config: Dict[str, Any]) -> str:
+    """Return the Whisper model size to use for a file of ``duration_s`` seconds."""
+    short_model = config.get('short_model_size')
+    max_s = config.get('short_model_max_s', SHORT_FILE_MAX_S)
+    if short_model and duration_s is not None and duration_s < max_s:
+        return short_model
+    return config.get('model_size', 'base.en')
+
+
+def select_asr(models: Dict[str, Any], duration_future, config: Dict[str, Any]):
+    """Pick the loaded ASR model for a file, waiting on its probe_duration_async
+    Future only when a short-file model was loaded."""
+    if models.get('asr_short') is None:
+        return models['asr']
+    try:
+        duration = duration_future.result()
+    except Exception:
+        duration = None
+    if pick_model(duration, config) == config['short_model_size']:
+        return models['asr_short']
+    return models['asr']
+
+
+class AlignModelCache:
+    """Alignment models loaded lazily, once per language, for the whole run.
+    
+    A language whose model fails to load is remembered as unavailable so the
+    load is not retried for every file.
+    """
+    
+    def __init__(self, device: str):
+        self.device = device
+        self._models: Dict[str, Any] = {}
+    
+    def get(self, language: Optional[str]):
+        """Return ``(model, metadata)`` for ``language``, or ``(None, None)``."""
+        if not language:
+            return None, None
+        if language not in self._models:
+            import whisperx
+            try:
+                self._models[language] = whisperx.load_align_model(language_code=language, device=self.device)
+            except Exception as e:
+                logger.warning(f"Warning: Could not load alignment model for '{language}': {e}")
+                self._models[language] = (None, None)
+        return self._models[language]
+
+
+def build_models(config: Dict[str, Any], model_size: str, device: str, compute_type: str) -> Dict[str, Any]:
+    """Load every model the run needs once, before the file loop.
+    
+    Returns a dict with ``asr``, ``asr_short``, ``align_model``,
+    ``align_meta``, ``align_cache`` and ``diar_pipeline``;
+    optional entries are None when disabled or when loading fails. A
+    ``compute_type`` of None or ``"auto"`` is resolved by pick_compute().
+    """
+    import whisperx
+    
+    if compute_type in (None, 'auto'):
+        compute_type = pick_compute(device)
+    logger.info(f"Loading Whisper model ({compute_type})...")
+    # faster-whisper takes the GPU ordinal separately ("cuda:1" -> "cuda", 1)
+    asr_device, _, device_index = device.partition(':')
+    asr_kwargs = {'device_index': int(device_index)} if device_index else {}
+    models = {
+        'asr': whisperx.load_model(model_size, asr_device, compute_type=compute_type, **asr_kwargs),
+        'asr_short': None,
+        'align_model': None,
+        'align_meta': None,
+        'align_cache': None,
+        'diar_pipeline': None,
+    }
+    
+    # Optional smaller model for short files
+    short_model = config.get('short_model_size')
+    if short_model and short_model != model_size:
+        models['asr_short'] = whisperx.load_model(short_model, asr_device, compute_type=compute_type, **asr_kwargs)
+    
+    # Alignment models are cached per language; `align: false` skips alignment entirely
+    if config.get('align', True):
+        models['align_cache'] = AlignModelCache(device)
+        # Load the configured language up front
+        models['align_model'], models['align_meta'] = models['align_cache'].get(config.get('language'))
+    
+    # Load diarization model if needed
+    if config.get('diarization', False) and config.get('diarization_backend') == 'pyannote':
+        try:
+            models['diar_pipeline'] = load_diarization_model(config, device)
+        except Exception as e:
+            logger.warning(f"Warning: Could not load diarization model: {e}")
+            logger.info("Continuing without diarization...")
+    
+    return models
+
+
+# Per-process state for run_worker_pool workers, filled in by _init_worker
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(config: Dict[str, Any], model_size: str, devices: List[str], compute_type: str,
+                 output_dir: str, force: bool, counter):
+    """Pool initializer: claim a device round-robin and load the models once."""
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    device = devices[index % len(devices)]
+    configure_logging()
+    # The default batch size follows this worker's device; an explicit one is kept
+    config = {**config, 'batch_size': config.get('batch_size') or default_batch_size(device)}
+    _worker_state.update(config=config, output_dir=output_dir, force=force, init_error=None)
+    # An initializer that raises makes the Pool respawn workers forever, so a
+    # model that fails to load is reported through the first task instead
+    try:
+        _worker_state['models'] = build_models(config, model_size, device, compute_type)
+    except Exception as e:
+        _worker_state['init_error'] = f"{device}: {type(e).__name__}: {e}"
+
+
+def _transcribe_in_worker(audio_file: str) -> Optional[Dict[str, Any]]:
+    """Transcribe one file inside a pool worker; errors are returned, not raised."""
+    state = _worker_state
+    if state['init_error'] is not None:
+        return {'file': audio_file, 'status': 'error', 'init_error': state['init_error']}
+    # A concurrent run may have finished this stem since the parent listed it
+    if not state['force'] and is_already_processed(audio_file, state['output_dir']):
+        return None
+    models = state['models']
+    try:
+        duration_future = probe_duration_async(audio_file)
+        return transcribe_file(audio_file, state['output_dir'], state['config'],
+                               select_asr(models, duration_future, state['config']), models['align_model'], models['align_meta'],
+                               models['diar_pipeline'], models['align_cache'], duration_future)
+    except Exception as e:
+        return {'file': audio_file, 'status': 'error', 'error': str(e)}
+    finally:
+        # Workers have their own buffered handler; push each file's lines out
+        flush_logs()
+
+
+def _passthrough_progress(iterable, **kwargs):
+    """Progress wrapper that shows nothing; accepts tqdm's keyword arguments."""
+    return iterable
+
+
+def run_worker_pool(files: List[str], args, config: Dict[str, Any], model_size: str,
+                    devices: List[str], compute_type: str, stats: Dict[str, Any],
+                    progress=_passthrough_progress):
+    """Transcribe local files on ``args.workers`` processes, each holding its own models.
+    
+    Workers are assigned ``devices`` round-robin and pull files one at a time,
+    so long and short files balance out. ``stats`` is updated in the parent.
+    """
+    import multiprocessing
+    
+    # Two inputs with the same stem share one set of outputs; keep the first so
+    # no two workers write the same files at once
+    unique_files = []
+    seen_stems = set()
+    for f in files:
+        stem = Path(f).stem
+        if stem in seen_stems:
+            logger.info(f"Skipping {f}: another input already writes {stem}.json")
+            continue
+        seen_stems.add(stem)
+        unique_files.append(f)
+    files = unique_files
+    
+    # spawn, not fork: CUDA cannot be re-initialised in a forked child
+    ctx = multiprocessing.get_context('spawn')
+    counter = ctx.Value('i', 0)
+    logger.info(f"Starting {args.workers} workers on {', '.join(devices)}")
+    with ctx.Pool(args.workers, initializer=_init_worker,
+                  initargs=(config, model_size, devices, compute_type, args.output_dir, args.force, counter)) as pool:
+        results = pool.imap_unordered(_transcribe_in_worker, files)
+        for result in progress(results, total=len(files), desc="Transcribing"):
+            if result is None:
+                continue
+            if result.get('init_error'):
+                pool.terminate()
+                raise RuntimeError(f"Worker failed to load models on {result['init_error']}")
+            if result.get('status') != 'success':
+                logger.error(f"Error processing {result['file']}: {result.get('error')}")
+                stats['error_count'] += 1
+                continue
+            stats['files_processed'] += 1
+            stats['total_duration'] += result['duration']
+            stats['success_count'] += 1
+
+
+def transcribe_file(audio_file: str, output_dir: str, config: Dict[str, Any], model, model_a=None, metadata=None, diarization_pipeline=None, align_cache: Optional[AlignModelCache] = None, duration_future=None) -> Dict[str, Any]:
+    """Transcribe a single audio file.
+    
+    Without an explicit ``model_a``, an ``align_cache`` supplies the alignment
+    model for the language Whisper detected. ``duration_future`` reuses a
+    probe_duration_async call the caller already started.
+    """
     import whisperx
     
     audio_path = Path(audio_file)
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    print(f"Processing: {audio_file}")
+    logger.info(f"Processing: {audio_file}")
+    # Show which file is running now, not when the next stage logs
+    flush_logs()
+    
+    # ffprobe only feeds the stats, so let it run alongside transcription
+    if duration_future is None:
+        duration_future = probe_duration_async(audio_file)
     
     # Load audio
     audio = whisperx.load_audio(audio_file)
     
     # Transcribe
-    result = model.transcribe(audio, batch_size=config.get('batch_size', 8))
+    result = model.transcribe(audio, batch_size=config.get('batch_size', 8),
+                              chunk_size=config.get('segment_max_duration_s', 30))
     
     # Align if model_a is available
+    if model_a is None and align_cache is not None:
+        model_a, metadata = align_cache.get(result.get('language') or config.get('language'))
     if model_a is not None:
         result = whisperx.align(result["segments"], model_a, metadata, audio, device="cpu", return_char_alignments=False)
     
     # Diarization if enabled
     if config.get('diarization', False) and config.get('diarization_backend') == 'pyannote' and diarization_pipeline is not None:
         try:
-            diarization_result = perform_diarization(audio_file, diarization_pipeline, config)
+            diarization_result = perform_diarization(audio_file, diarization_pipeline, config, audio)
             if diarization_result['segments']:
                 # Assign speakers to transcription segments
                 result["segments"] = assign_speakers_to_segments(result["segments"], diarization_result['segments'])
                 result["speakers"] = diarization_result['speakers']
-                print(f"Diarization complete: {len(diarization_result['speakers'])} speakers identified")
+                logger.info(f"Diarization complete: {len(diarization_result['speakers'])} speakers identified")
             else:
-                print("Warning: Diarization found no speakers")
+                logger.warning("Warning: Diarization found no speakers")
         except Exception as e:
-            print(f"Warning: Diarization failed: {e}")
+            logger.warning(f"Warning: Diarization failed: {e}")
             # Continue without diarization
     elif config.get('diarization', False) and diarization_pipeline is None:
-        print("Note: Diarization requested but model not loaded")
+        logger.info("Note: Diarization requested but model not loaded")
     
     # Write outputs
     base_name = audio_path.stem
     
-    if config.get('write_json', True):
-        json_file = output_path / f"{base_name}.json"
-        with open(json_file, 'w') as f:
-            json.dump(result, f, indent=2)
-    
     if config.get('write_srt', True):
         srt_file = output_path / f"{base_name}.srt"
         write_srt(result, srt_file)
@@ -334,74 +1031,95 @@ def transcribe_file(audio_file: str, output_dir: str, config: Dict[str, Any], mo
         txt_file = output_path / f"{base_name}.txt"
         write_txt(result, txt_file)
     
+    # JSON goes last: it doubles as the "done" marker, so write to a temp file
+    # and rename so a crash never leaves a half-written transcript behind
+    if config.get('write_json', True):
+        json_file = output_path / f"{base_name}.json"
+        tmp_file = output_path / f"{base_name}.json.tmp"
+        write_json(result, tmp_file)
+        os.replace(tmp_file, json_file)
+    else:
+        # Without a JSON transcript, an empty marker records that this file is done
+        (output_path / f"{base_name}.done").touch()
+    
+    # Container metadata is exact and cheap; the decoded length is only a fallback
+    try:
+        duration = duration_future.result(timeout=5)
+    except Exception:
+        duration = None
+    if duration is None:
+        duration = len(audio) / SAMPLE_RATE
+    
     return {
         'file': audio_file,
-        'duration': len(audio) / 16000,  # Approximate duration
+        'duration': duration,
         'segments': len(result.get('segments', [])),
         'status': 'success'
     }
 
 
+def _cue_text(segment: Dict) -> str:
+    """Segment text with a ``[SPEAKER]`` prefix when a speaker is known."""
+    text = segment['text'].strip()
+    speaker = segment.get('speaker')
+    return f"[{speaker}] {text}" if speaker else text
+
+
 def write_srt(result: Dict, output_file: Path):
     """Write SRT subtitle file."""
-    with open(output_file, 'w') as f:
-        for i, segment in enumerate(result.get('segments', []), 1):
-            start = format_time(segment['start'])
-            end = format_time(segment['end'])
-            text = segment['text'].strip()
-            
-            # Add speaker label if available
-            if 'speaker' in segment and segment['speaker']:
-                speaker_label = segment['speaker']
-                text = f"[{speaker_label}] {text}"
-            
-            f.write(f"{i}\n{start} --> {end}\n{text}\n\n")
+    # Build the whole file in memory and write it in one call
+    parts = [
+        f"{i}\n{format_time(segment['start'])} --> {format_time(segment['end'])}\n{_cue_text(segment)}\n\n"
+        for i, segment in enumerate(result.get('segments', []), 1)
+    ]
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(''.join(parts))
 
 
 def write_vtt(result: Dict, output_file: Path):
     """Write VTT subtitle file."""
-    with open(output_file, 'w') as f:
-        f.write("WEBVTT\n\n")
-        for segment in result.get('segments', []):
-            start = format_time_vtt(segment['start'])
-            end = format_time_vtt(segment['end'])
-            text = segment['text'].strip()
-            
-            # Add speaker label if available
-            if 'speaker' in segment and segment['speaker']:
-                speaker_label = segment['speaker']
-                text = f"[{speaker_label}] {text}"
-            
-            f.write(f"{start} --> {end}\n{text}\n\n")
+    parts = ["WEBVTT\n\n"]
+    parts.extend(
+        f"{format_time_vtt(segment['start'])} --> {format_time_vtt(segment['end'])}\n{_cue_text(segment)}\n\n"
+        for segment in result.get('segments', [])
+    )
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(''.join(parts))
 
 
 def write_txt(result: Dict, output_file: Path):
     """Write plain text file."""
-    with open(output_file, 'w') as f:
-        current_speaker = None
-        for segment in result.get('segments', []):
-            text = segment['text'].strip()
-            
-            # Add speaker label if it changes
-            if 'speaker' in segment and segment['speaker']:
-                if segment['speaker'] != current_speaker:
-                    current_speaker = segment['speaker']
-                    f.write(f"\n\n[{current_speaker}]\n")
-            
-            f.write(text + ' ')
+    parts = []
+    current_speaker = None
+    for segment in result.get('segments', []):
+        # Add speaker label if it changes
+        speaker = segment.get('speaker')
+        if speaker and speaker != current_speaker:
+            current_speaker = speaker
+            parts.append(f"\n\n[{current_speaker}]\n")
+        
+        parts.append(segment['text'].strip())
+        parts.append(' ')
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(''.join(parts))
+
+
+def write_json(result: Dict, output_file: Path):
+    """Write the transcript result as indented JSON, using orjson when available."""
+    if orjson is not None:
+        # orjson also serializes numpy arrays and scalars left in the result
+        Path(output_file).write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
 
 
 def write_csv(result: Dict, output_file: Path):
     """Write CSV file with timestamps, speaker, and text columns."""
     import csv
     
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        
-        # Write header
-        writer.writerow(['start_time', 'end_time', 'speaker', 'text'])
-        
-        # Write segments
+    def rows():
         for segment in result.get('segments', []):
             start_time = segment.get('start', 0)
             end_time = segment.get('end', 0)
@@ -416,42 +1134,55 @@ def write_csv(result: Dict, output_file: Path):
             if speaker is None:
                 speaker = 'N/A'
             
-            writer.writerow([start_time, end_time, speaker, text])
+            yield [start_time, end_time, speaker, text]
+    
+    # A 64 KiB buffer batches the per-row writes into a few large ones
+    with open(output_file, 'w', newline='', encoding='utf-8', buffering=1 << 16) as f:
+        writer = csv.writer(f)
+        writer.writerow(['start_time', 'end_time', 'speaker', 'text'])
+        writer.writerows(rows())
+
+
+def _split_time(seconds: float):
+    """Split seconds into (hours, minutes, seconds, milliseconds) using integer math."""
+    total_ms = int(round(seconds * 1000))
+    total_s, ms = divmod(total_ms, 1000)
+    minutes, secs = divmod(total_s, 60)
+    hours, minutes = divmod(minutes, 60)
+    return hours, minutes, secs, ms
 
 
+# Adjacent cues usually share a boundary, so each timestamp is formatted twice
+@lru_cache(maxsize=1024)
 def format_time(seconds: float) -> str:
     """Format time for SRT format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}".replace('.', ',')
+    h, m, s, ms = _split_time(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
 
+@lru_cache(maxsize=1024)
 def format_time_vtt(seconds: float) -> str:
     """Format time for VTT format."""
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    secs = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
+    h, m, s, ms = _split_time(seconds)
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
 
 
 def export_json_to_csv(json_file: Path, csv_file: Path = None):
     """Export a single JSON transcript file to CSV format."""
-    import json
+    from .db import load_json_file
     
     if csv_file is None:
         csv_file = json_file.with_suffix('.csv')
     
     try:
-        with open(json_file, 'r') as f:
-            data = json.load(f)
+        data = load_json_file(json_file)
         
         write_csv(data, csv_file)
-        print(f"✅ Exported {json_file.name} -> {csv_file.name}")
+        logger.info(f"✅ Exported {json_file.name} -> {csv_file.name}")
         return True
         
     except Exception as e:
-        print(f"❌ Error exporting {json_file.name}: {e}")
+        logger.error(f"❌ Error exporting {json_file.name}: {e}")
         return False
 
 
@@ -460,15 +1191,15 @@ def batch_export_csv(output_dir: str, force: bool = False):
     output_path = Path(output_dir)
     
     if not output_path.exists():
-        print(f"❌ Output directory '{output_dir}' does not exist")
+        logger.info(f"❌ Output directory '{output_dir}' does not exist")
         return
     
     json_files = list(output_path.glob("*.json"))
     if not json_files:
-        print(f"❌ No JSON transcript files found in '{output_dir}'")
+        logger.info(f"❌ No JSON transcript files found in '{output_dir}'")
         return
     
-    print(f"🔄 Found {len(json_files)} JSON transcript files")
+    logger.info(f"🔄 Found {len(json_files)} JSON transcript files")
     
     exported_count = 0
     skipped_count = 0
@@ -479,7 +1210,7 @@ def batch_export_csv(output_dir: str, force: bool = False):
         
         # Skip if CSV already exists and not forcing
         if csv_file.exists() and not force:
-            print(f"⏭️  Skipping {json_file.name} (CSV already exists, use --force to overwrite)")
+            logger.info(f"⏭️  Skipping {json_file.name} (CSV already exists, use --force to overwrite)")
             skipped_count += 1
             continue
         
@@ -488,52 +1219,51 @@ def batch_export_csv(output_dir: str, force: bool = False):
         else:
             error_count += 1
     
-    print(f"\n📊 CSV Export Summary:")
-    print(f"   ✅ Exported: {exported_count}")
-    print(f"   ⏭️  Skipped: {skipped_count}")
-    print(f"   ❌ Errors: {error_count}")
+    logger.info("\n📊 CSV Export Summary:")
+    logger.info(f"   ✅ Exported: {exported_count}")
+    logger.info(f"   ⏭️  Skipped: {skipped_count}")
+    logger.info(f"   ❌ Errors: {error_count}")
     
     if exported_count > 0:
-        print(f"\n💡 CSV files are ready for Excel/Google Sheets with columns:")
-        print(f"   • start_time: Segment start time in seconds")
-        print(f"   • end_time: Segment end time in seconds") 
-        print(f"   • speaker: Speaker ID (N/A if no diarization)")
-        print(f"   • text: Transcript text")
+        logger.info("\n💡 CSV files are ready for Excel/Google Sheets with columns:")
+        logger.info("   • start_time: Segment start time in seconds")
+        logger.info("   • end_time: Segment end time in seconds")
+        logger.info("   • speaker: Speaker ID (N/A if no diarization)")
+        logger.info("   • text: Transcript text")
 
 
 def cleanup_file(file_path: str):
     """Remove a file after processing."""
     try:
         os.remove(file_path)
-        print(f"Cleaned up: {file_path}")
+        logger.info(f"Cleaned up: {file_path}")
     except OSError as e:
-        print(f"Warning: Could not clean up {file_path}: {e}")
+        logger.warning(f"Warning: Could not clean up {file_path}: {e}")
 
 
 def log_run(run_log_path: str, stats: Dict[str, Any]):
-    """Log run statistics to CSV file."""
+    """Append run statistics as one JSON line (read with ``pandas.read_json(path, lines=True)``)."""
     log_path = Path(run_log_path)
     log_path.parent.mkdir(parents=True, exist_ok=True)
     
-    file_exists = log_path.exists()
+    if orjson is not None:
+        line = orjson.dumps(stats)
+    else:
+        line = json.dumps(stats).encode('utf-8')
     
-    with open(log_path, 'a', newline='') as f:
-        fieldnames = ['timestamp', 'files_processed', 'total_duration', 'success_count', 'error_count']
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        
-        if not file_exists:
-            writer.writeheader()
-        
-        writer.writerow(stats)
+    with open(log_path, 'ab') as f:
+        f.write(line + b'\n')
 
 
-def main():
-    """Main entry point."""
+def main(argv: Optional[List[str]] = None):
+    """Main entry point. ``argv`` defaults to ``sys.argv[1:]``."""
     parser = argparse.ArgumentParser(description="Batch transcribe audio files")
     parser.add_argument("--rclone_remote", help="Rclone remote name")
     parser.add_argument("--remote_path", help="Remote path to sync from")
+    parser.add_argument("--backend", help="Read directly from object storage instead of rclone (e.g. s3://bucket/prefix)")
     parser.add_argument("--input_dir", help="Local input directory")
     parser.add_argument("--scratch_dir", help="Scratch directory for temporary files")
+    parser.add_argument("--scratch_tmpfs", action="store_true", help=f"Use {TMPFS_ROOT} (RAM) as the scratch directory")
     parser.add_argument("--include_ext", default=".mp3,.wav,.m4a,.mp4,.mov", help="File extensions to include")
     parser.add_argument("--max_files", type=int, help="Maximum number of files to process")
     parser.add_argument("--output_dir", required=True, help="Output directory for transcripts")
@@ -544,9 +1274,14 @@ def main():
     parser.add_argument("--wait_if_low_disk", action="store_true", help="Wait if disk space is low")
     parser.add_argument("--check_interval_s", type=int, default=30, help="Disk check interval in seconds")
     parser.add_argument("--max_wait_min", type=int, default=60, help="Maximum wait time in minutes")
-    parser.add_argument("--run_log", help="Run log file path")
+    parser.add_argument("--run_log", help="Run log file path (JSON lines, e.g. out/run_log.jsonl)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for local input (each loads its own models)")
+    parser.add_argument("--devices", help="Comma-separated devices assigned to workers round-robin (e.g. cuda:0,cuda:1)")
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if bool(args.rclone_remote) != bool(args.remote_path):
+        parser.error("--rclone_remote and --remote_path must be given together")
+    configure_logging()
     
     # Load config
     config = {}
@@ -560,7 +1295,15 @@ def main():
     # Set defaults
     model_size = config.get('model_size', 'base.en')
     device = config.get('device', 'cpu')
-    compute_type = config.get('compute_type', 'int8')
+    compute_type = config.get('compute_type') or 'auto'
+    
+    if args.scratch_tmpfs:
+        # Download into RAM so the copy and the decode never touch the disk;
+        # --min_free_gb then guards the tmpfs instead
+        if not os.path.isdir(TMPFS_ROOT):
+            raise ValueError(f"--scratch_tmpfs requires {TMPFS_ROOT}")
+        args.scratch_dir = os.path.join(TMPFS_ROOT, 'eduasr_scratch')
+        os.makedirs(args.scratch_dir, exist_ok=True)
     
     # Check disk space if required
     scratch_dir = args.scratch_dir or args.output_dir
@@ -568,98 +1311,77 @@ def main():
         wait_for_disk_space(scratch_dir, args.min_free_gb, args.check_interval_s, args.max_wait_min)
     
     # Get list of files to process
-    files_to_process = []
-    remote_files = []
     is_remote_processing = False
+    backend = make_backend(args, config)
     
-    if args.rclone_remote and args.remote_path:
+    if backend is not None:
         # List remote files
         if not args.scratch_dir:
-            raise ValueError("--scratch-dir is required when using rclone")
+            raise ValueError("--scratch-dir is required when reading from a remote")
         is_remote_processing = True
-        all_remote_files = list_remote_files(args.rclone_remote, args.remote_path, args.include_ext)
-        
-        print(f"\n📋 Found {len(all_remote_files)} matching files on remote:")
-        for i, f in enumerate(all_remote_files, 1):
-            print(f"  {i:3d}. {f}")
-        
-        # Filter already processed files by checking output directory
-        if not args.force:
-            already_processed = [f for f in all_remote_files if is_already_processed_remote(f, args.output_dir)]
-            remote_files = [f for f in all_remote_files if not is_already_processed_remote(f, args.output_dir)]
-            
-            if already_processed:
-                print(f"\n✅ Skipping {len(already_processed)} already processed files:")
-                for i, f in enumerate(already_processed, 1):
-                    print(f"  {i:3d}. {f} (found {Path(args.output_dir) / f'{Path(f).stem}.done'})")
-        else:
-            remote_files = all_remote_files
-            print(f"\n🔄 Force mode: will re-process all files")
-        
-        # For remote files, we process the list directly
-        files_to_process = remote_files
+        all_files = backend.list(args.include_ext)
+        source_label = "on remote"
     elif args.input_dir:
         # Use local files
-        all_local_files = find_local_files(args.input_dir, args.include_ext)
-        
-        print(f"\n📋 Found {len(all_local_files)} matching files in {args.input_dir}:")
-        for i, f in enumerate(all_local_files, 1):
-            print(f"  {i:3d}. {f}")
-        
-        # Filter already processed files
-        if not args.force:
-            already_processed = [f for f in all_local_files if is_already_processed(f, args.output_dir)]
-            files_to_process = [f for f in all_local_files if not is_already_processed(f, args.output_dir)]
-            
-            if already_processed:
-                print(f"\n✅ Skipping {len(already_processed)} already processed files:")
-                for i, f in enumerate(already_processed, 1):
-                    print(f"  {i:3d}. {Path(f).name}")
-        else:
-            files_to_process = all_local_files
-            print(f"\n🔄 Force mode: will re-process all files")
-            
+        all_files = find_local_files(args.input_dir, args.include_ext)
+        source_label = f"in {args.input_dir}"
     elif args.scratch_dir:
         # Use files in scratch directory
-        all_scratch_files = find_local_files(args.scratch_dir, args.include_ext)
-        
-        print(f"\n📋 Found {len(all_scratch_files)} matching files in {args.scratch_dir}:")
-        for i, f in enumerate(all_scratch_files, 1):
-            print(f"  {i:3d}. {f}")
+        all_files = find_local_files(args.scratch_dir, args.include_ext)
+        source_label = f"in {args.scratch_dir}"
+    else:
+        raise ValueError("Must specify either --rclone-remote/--remote-path, --backend, --input_dir, or --scratch-dir")
+    
+    # Split every path once into (path, name, stem) for filtering and reporting
+    entries = []
+    for f in all_files:
+        name = os.path.basename(f)
+        entries.append((f, name, os.path.splitext(name)[0]))
+    
+    verbose = logger.isEnabledFor(logging.INFO)
+    output_dir_p = Path(args.output_dir)
+    
+    if verbose:
+        logger.info(f"\n📋 Found {len(entries)} matching files {source_label}:")
+        for i, (path, _, _) in enumerate(entries, 1):
+            logger.info(f"  {i:3d}. {path}")
+    
+    # Filter already processed files by checking output directory
+    done_stems = set()
+    if not args.force:
+        done_stems = scan_done_set(args.output_dir)
+        already_processed = [e for e in entries if e[2] in done_stems]
+        entries = [e for e in entries if e[2] not in done_stems]
         
-        # Filter already processed files
-        if not args.force:
-            already_processed = [f for f in all_scratch_files if is_already_processed(f, args.output_dir)]
-            files_to_process = [f for f in all_scratch_files if not is_already_processed(f, args.output_dir)]
-            
-            if already_processed:
-                print(f"\n✅ Skipping {len(already_processed)} already processed files:")
-                for i, f in enumerate(already_processed, 1):
-                    print(f"  {i:3d}. {Path(f).name}")
-        else:
-            files_to_process = all_scratch_files
-            print(f"\n🔄 Force mode: will re-process all files")
+        if already_processed and verbose:
+            logger.info(f"\n✅ Skipping {len(already_processed)} already processed files:")
+            for i, (path, name, stem) in enumerate(already_processed, 1):
+                if is_remote_processing:
+                    logger.info(f"  {i:3d}. {path} (found {output_dir_p / f'{stem}.json'})")
+                else:
+                    logger.info(f"  {i:3d}. {name}")
     else:
-        raise ValueError("Must specify either --rclone-remote/--remote-path, --input_dir, or --scratch-dir")
+        logger.info("\n🔄 Force mode: will re-process all files")
     
     # Limit number of files
-    original_count = len(files_to_process)
-    if args.max_files and len(files_to_process) > args.max_files:
-        files_to_process = files_to_process[:args.max_files]
-        print(f"\n⚠️  Limited to first {args.max_files} files (from {original_count} total)")
+    original_count = len(entries)
+    if args.max_files and len(entries) > args.max_files:
+        entries = entries[:args.max_files]
+        logger.warning(f"\n⚠️  Limited to first {args.max_files} files (from {original_count} total)")
     
-    if not files_to_process:
-        print("\n❌ No files to process")
+    if not entries:
+        logger.info("\n❌ No files to process")
         return 0
     
-    print(f"\n🎯 Will transcribe {len(files_to_process)} files:")
-    for i, f in enumerate(files_to_process, 1):
-        if is_remote_processing:
-            print(f"  {i:3d}. {f} (will download first)")
-        else:
-            print(f"  {i:3d}. {Path(f).name}")
+    if verbose:
+        logger.info(f"\n🎯 Will transcribe {len(entries)} files:")
+        for i, (path, name, _) in enumerate(entries, 1):
+            if is_remote_processing:
+                logger.info(f"  {i:3d}. {path} (will download first)")
+            else:
+                logger.info(f"  {i:3d}. {name}")
     
-    print(f"\n🚀 Starting transcription...")
+    logger.info("\n🚀 Starting transcription...")
     
     # Load models
     try:
@@ -667,31 +1389,10 @@ def main():
         import torch
         from tqdm import tqdm
     except ImportError as e:
-        print(f"Error: Required packages not installed: {e}")
-        print("Please install with: pip install -r requirements.txt")
+        logger.error(f"Error: Required packages not installed: {e}")
+        logger.error("Please install with: pip install -r requirements.txt")
         return 1
     
-    print("Loading Whisper model...")
-    model = whisperx.load_model(model_size, device, compute_type=compute_type)
-    
-    # Load alignment model if needed
-    model_a = None
-    metadata = None
-    if config.get('language'):
-        try:
-            model_a, metadata = whisperx.load_align_model(language_code=config['language'], device=device)
-        except Exception as e:
-            print(f"Warning: Could not load alignment model: {e}")
-    
-    # Load diarization model if needed
-    diarization_pipeline = None
-    if config.get('diarization', False) and config.get('diarization_backend') == 'pyannote':
-        try:
-            diarization_pipeline = load_diarization_model(config, device)
-        except Exception as e:
-            print(f"Warning: Could not load diarization model: {e}")
-            print("Continuing without diarization...")
-    
     # Process files
     stats = {
         'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
@@ -701,65 +1402,112 @@ def main():
         'error_count': 0
     }
     
-    for file_ref in tqdm(files_to_process, desc="Transcribing"):
-        local_file_path = None
-        try:
-            # Check disk space before processing each file
+    if args.workers > 1 and not is_remote_processing:
+        devices = args.devices.split(',') if args.devices else [device]
+        run_worker_pool([path for path, _, _ in entries], args, config, model_size, devices,
+                        compute_type, stats, tqdm)
+    else:
+        config.setdefault('batch_size', default_batch_size(device))
+        models = build_models(config, model_size, device, compute_type)
+        
+        # Remote files are downloaded one ahead on a background thread, so the next
+        # copy overlaps with transcription of the current file
+        fetcher = ThreadPoolExecutor(max_workers=1) if is_remote_processing else None
+        prefetched = {}
+        
+        def start_prefetch(index: int, current_name: str):
+            if index >= len(entries):
+                return
+            next_ref, next_name, _ = entries[index]
+            # Same basename would overwrite the file being transcribed in scratch
+            if next_name == current_name:
+                return
             if args.wait_if_low_disk and get_disk_free_gb(scratch_dir) < args.min_free_gb:
-                wait_for_disk_space(scratch_dir, args.min_free_gb, args.check_interval_s, args.max_wait_min)
-            
-            if is_remote_processing:
-                # file_ref is a remote path, sync it first
-                print(f"Syncing {file_ref}...")
-                local_file_path = sync_single_file(args.rclone_remote, 
-                                                 f"{args.remote_path}/{file_ref}", 
-                                                 args.scratch_dir)
-                if not local_file_path:
-                    print(f"Failed to sync {file_ref}, skipping...")
-                    stats['error_count'] += 1
-                    continue
+                return
+            logger.info(f"Prefetching {next_ref}...")
+            prefetched[next_ref] = fetcher.submit(backend.download, next_ref, args.scratch_dir)
+        
+        last_file_mb = 0.0
+        # tqdm draws on stderr so the bar stays live while log lines are batched on stdout
+        for index, (file_ref, name, stem) in enumerate(tqdm(entries, desc="Transcribing")):
+            # Two inputs with the same stem share one set of outputs; keep the first
+            if not args.force and stem in done_stems:
+                logger.info(f"Skipping {file_ref}: {stem}.json was written earlier in this run")
+                continue
+            local_file_path = None
+            try:
+                # Check disk space before processing each file; reuse a recent reading
+                # unless the previous file was large enough to have moved the needle
+                if args.wait_if_low_disk:
+                    max_age_s = 0.0 if last_file_mb > DISK_RECHECK_MIN_MB else DISK_CACHE_TTL_S
+                    if get_disk_free_gb(scratch_dir, max_age_s) < args.min_free_gb:
+                        wait_for_disk_space(scratch_dir, args.min_free_gb, args.check_interval_s, args.max_wait_min)
                 
-                # Use the local file path for processing
-                process_file_path = local_file_path
-            else:
-                # file_ref is already a local path
-                process_file_path = file_ref
-                local_file_path = file_ref
-            
-            result = transcribe_file(process_file_path, args.output_dir, config, model, model_a, metadata, diarization_pipeline)
-            
-            stats['files_processed'] += 1
-            stats['total_duration'] += result['duration']
-            stats['success_count'] += 1
-            
-            # Mark as processed (use original reference for consistent naming)
-            if is_remote_processing:
-                # For remote files, create done file based on original remote filename
-                filename = Path(file_ref).name
-                audio_path = Path(filename)
-                done_file = Path(args.output_dir) / f"{audio_path.stem}.done"
-                done_file.touch()
-            else:
-                mark_as_processed(process_file_path, args.output_dir)
-            
-            # Clean up local file if it was synced from remote
-            if is_remote_processing and local_file_path:
-                print(f"Cleaning up {local_file_path}")
-                cleanup_file(local_file_path)
+                if is_remote_processing:
+                    # file_ref is a remote path; use the prefetched copy or sync it now
+                    future = prefetched.pop(file_ref, None)
+                    if future is not None:
+                        local_file_path = future.result()
+                    else:
+                        logger.info(f"Syncing {file_ref}...")
+                        local_file_path = backend.download(file_ref, args.scratch_dir)
+                    if not local_file_path:
+                        logger.warning(f"Failed to sync {file_ref}, skipping...")
+                        stats['error_count'] += 1
+                        continue
+                    
+                    # Use the local file path for processing
+                    process_file_path = local_file_path
+                    start_prefetch(index + 1, name)
+                else:
+                    # file_ref is already a local path
+                    process_file_path = file_ref
+                    local_file_path = file_ref
                 
-        except Exception as e:
-            print(f"Error processing {file_ref}: {e}")
-            stats['error_count'] += 1
-            # Clean up local file even on error if it was synced
-            if is_remote_processing and local_file_path:
-                cleanup_file(local_file_path)
-    
+                try:
+                    last_file_mb = os.path.getsize(process_file_path) / (1024**2)
+                except OSError:
+                    last_file_mb = 0.0
+                
+                duration_future = probe_duration_async(process_file_path)
+                result = transcribe_file(process_file_path, args.output_dir, config,
+                                         select_asr(models, duration_future, config), models['align_model'], models['align_meta'],
+                                         models['diar_pipeline'], models['align_cache'], duration_future)
+                
+                stats['files_processed'] += 1
+                stats['total_duration'] += result['duration']
+                stats['success_count'] += 1
+                done_stems.add(stem)
+                
+                # Clean up local file if it was synced from remote
+                if is_remote_processing and local_file_path:
+                    logger.info(f"Cleaning up {local_file_path}")
+                    cleanup_file(local_file_path)
+                    
+            except Exception as e:
+                logger.error(f"Error processing {file_ref}: {e}")
+                stats['error_count'] += 1
+                # Clean up local file even on error if it was synced
+                if is_remote_processing and local_file_path:
+                    cleanup_file(local_file_path)
+        
+        if fetcher is not None:
+            fetcher.shutdown(wait=True)
+            # Drop any download that was started but never consumed
+            for future in prefetched.values():
+                leftover = future.result()
+                if leftover:
+                    cleanup_file(leftover)
+        
     # Log run statistics
     if args.run_log:
         log_run(args.run_log, stats)
     
-    print(f"\nCompleted: {stats['success_count']} successful, {stats['error_count']} errors")
-    print(f"Total duration processed: {stats['total_duration']:.1f} seconds")
+    logger.info(f"\nCompleted: {stats['success_count']} successful, {stats['error_count']} errors")
+    logger.info(f"Total duration processed: {stats['total_duration']:.1f} seconds")
+    
+    # Emit the batched summary now rather than at interpreter exit
+    flush_logs()
     
     return 0
 
@@ -13,9 +13,11 @@ locally and requires `streamlit` (added to requirements).
 
 from __future__ import annotations
 
+import json
 import os
 import stat
 import subprocess
+import time
 from pathlib import Path
 from typing import List, Optional
 
@@ -26,6 +28,7 @@ APP_STATE_DIR = Path.home() / ".eduasr"
 APP_STATE_DIR.mkdir(parents=True, exist_ok=True)
 HF_TOKEN_FILE_HOME = APP_STATE_DIR / "hf_token"
 HF_TOKEN_FILE_LOCAL = Path("hf")
+RCLONE_REMOTES_CACHE = APP_STATE_DIR / "rclone_remotes.json"
 
 
 def read_text_safely(path: Path) -> Optional[str]:
@@ -38,22 +41,39 @@ def read_text_safely(path: Path) -> Optional[str]:
     return None
 
 
-def load_hf_token() -> Optional[str]:
+def file_mtime(path: Path) -> float:
+    """Return the file's mtime, or 0.0 if it does not exist."""
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0.0
+
+
+@st.cache_data(ttl=60)
+def _load_hf_token_cached(env_token: Optional[str], home_mtime: float, local_mtime: float) -> Optional[str]:
+    # The token file mtimes are part of the cache key so edits invalidate it
     # Prefer environment variable
-    env_token = os.environ.get("HF_TOKEN")
     if env_token:
         return env_token.strip()
     # Then user-level file
-    token = read_text_safely(HF_TOKEN_FILE_HOME)
+    token = read_text_safely(HF_TOKEN_FILE_HOME) if home_mtime else None
     if token:
         return token
     # Finally local project file (ignored by git)
-    token = read_text_safely(HF_TOKEN_FILE_LOCAL)
+    token = read_text_safely(HF_TOKEN_FILE_LOCAL) if local_mtime else None
     if token:
         return token
     return None
 
 
+def load_hf_token() -> Optional[str]:
+    return _load_hf_token_cached(
+        os.environ.get("HF_TOKEN"),
+        file_mtime(HF_TOKEN_FILE_HOME),
+        file_mtime(HF_TOKEN_FILE_LOCAL),
+    )
+
+
 def save_hf_token(token: str, location: str) -> Path:
     target = HF_TOKEN_FILE_HOME if location == "home" else HF_TOKEN_FILE_LOCAL
     try:
@@ -65,42 +85,129 @@ def save_hf_token(token: str, location: str) -> Path:
             pass
     except Exception:
         pass
+    # mtime granularity can hide a quick rewrite, so drop cached tokens explicitly
+    _load_hf_token_cached.clear()
     return target
 
 
-def list_rclone_remotes() -> List[str]:
-    """Parse rclone.conf if available and return remote names."""
-    config_path = Path.home() / ".config" / "rclone" / "rclone.conf"
-    if not config_path.exists():
-        return []
+@st.cache_data
+def _list_remotes_cached(config_path: str, mtime_ns: int, size: int) -> List[str]:
+    # (path, mtime_ns, size) is the cache key so edits to rclone.conf invalidate it,
+    # both here and in the on-disk copy that survives app restarts
+    key = [config_path, mtime_ns, size]
+    try:
+        cached = json.loads(RCLONE_REMOTES_CACHE.read_bytes())
+        if cached.get("key") == key:
+            return cached["remotes"]
+    except Exception:
+        pass
+
     remotes: List[str] = []
     try:
-        for line in config_path.read_text(encoding="utf-8", errors="ignore").splitlines():
+        for line in Path(config_path).read_text(encoding="utf-8", errors="ignore").splitlines():
             line = line.strip()
             if line.startswith("[") and line.endswith("]"):
                 remotes.append(line[1:-1])
     except Exception:
         return []
+
+    try:
+        RCLONE_REMOTES_CACHE.write_text(json.dumps({"key": key, "remotes": remotes}), encoding="utf-8")
+    except Exception:
+        pass
     return remotes
 
 
+def list_rclone_remotes() -> List[str]:
+    """Parse rclone.conf if available and return remote names."""
+    config_path = Path.home() / ".config" / "rclone" / "rclone.conf"
+    try:
+        info = config_path.stat()
+    except OSError:
+        return []
+    return _list_remotes_cached(str(config_path), info.st_mtime_ns, info.st_size)
+
+
+def choose_folder(state_key: str) -> Optional[str]:
+    """Open a native folder chooser (local app only) and store the pick in session state."""
+    try:
+        # tkinter is cached in sys.modules after the first import; the Tk root is
+        # not reused because Streamlit may run each rerun on a different thread
+        import tkinter as tk
+        from tkinter import filedialog
+        root = tk.Tk()
+        root.withdraw()
+        try:
+            initial = st.session_state.get(state_key) or os.getcwd()
+            path = filedialog.askdirectory(initialdir=initial)
+        finally:
+            root.destroy()
+        if path:
+            st.session_state[state_key] = path
+            return path
+    except Exception:
+        st.warning("Folder chooser unavailable; enter a path manually.")
+    return None
+
+
+OUTPUT_FLUSH_INTERVAL_S = 0.1
+OUTPUT_FLUSH_LINES = 64
+OUTPUT_TAIL_LINES = 500
+
+
 def run_command(command: List[str], env: Optional[dict] = None) -> int:
-    """Run a subprocess command, stream output to the UI, and return exit code."""
+    """Run a subprocess command, stream output to the UI, and return exit code.
+
+    Output is redrawn into a single placeholder at most every 100 ms (or
+    every 64 lines) so chatty children do not flood the websocket.
+    """
+    # Python children block-buffer stdout on a pipe unless told otherwise
+    env = {**(env if env is not None else os.environ), "PYTHONUNBUFFERED": "1"}
+    placeholder = st.empty()
+    lines: List[str] = []
+    pending = 0
+    last_flush = time.monotonic()
     with subprocess.Popen(
         command,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
         text=True,
-        bufsize=1,
-        universal_newlines=True,
+        # The child flushes per line (PYTHONUNBUFFERED), so a block-buffered
+        # reader still sees lines promptly while issuing far fewer read() calls
+        bufsize=-1,
         env=env,
     ) as proc:
         assert proc.stdout is not None
         for line in proc.stdout:
-            st.write(line.rstrip())
+            lines.append(line.rstrip())
+            pending += 1
+            now = time.monotonic()
+            if pending >= OUTPUT_FLUSH_LINES or now - last_flush >= OUTPUT_FLUSH_INTERVAL_S:
+                del lines[:-OUTPUT_TAIL_LINES]
+                placeholder.code("\n".join(lines))
+                pending = 0
+                last_flush = now
+        if pending:
+            del lines[:-OUTPUT_TAIL_LINES]
+            placeholder.code("\n".join(lines))
         return proc.wait()
 
 
+# (form value key, CLI flag) pairs appended only when the value is set
+OPTIONAL_VALUE_FLAGS = [
+    ("include_ext", "--include-ext"),
+    ("max_files", "--max-files"),
+    ("config_path", "--config"),
+    ("model_size", "--model"),
+    ("min_free_gb", "--min-free-gb"),
+    ("run_log", "--run-log"),
+]
+OPTIONAL_SWITCH_FLAGS = [
+    ("force_reprocess", "--force"),
+    ("wait_if_low_disk", "--wait-if-low-disk"),
+]
+
+
 def build_cli_args(values: dict) -> List[str]:
     """Translate form values into CLI arguments for `python -m eduasr.cli transcribe`."""
     args: List[str] = [
@@ -122,26 +229,52 @@ def build_cli_args(values: dict) -> List[str]:
         args += ["--scratch-dir", values["scratch_dir"]]
 
     # Optional fields
-    if values["include_ext"]:
-        args += ["--include-ext", values["include_ext"]]
-    if values["max_files"]:
-        args += ["--max-files", str(values["max_files"]) ]
-    if values["config_path"]:
-        args += ["--config", values["config_path"]]
-    if values["model_size"]:
-        args += ["--model", values["model_size"]]
-    if values["force_reprocess"]:
-        args += ["--force"]
-    if values["wait_if_low_disk"]:
-        args += ["--wait-if-low-disk"]
-    if values["min_free_gb"]:
-        args += ["--min-free-gb", str(values["min_free_gb"]) ]
-    if values["run_log"]:
-        args += ["--run-log", values["run_log"]]
+    for key, flag in OPTIONAL_VALUE_FLAGS:
+        value = values.get(key)
+        if value:
+            args += [flag, str(value).strip()]
+    for key, flag in OPTIONAL_SWITCH_FLAGS:
+        if values.get(key):
+            args.append(flag)
 
     return args
 
 
+@st.fragment
+def transcription_runner(values: dict, hf_token: str) -> None:
+    """Start button and job output.
+
+    Runs as a fragment so clicking Start reruns only this block instead of
+    rebuilding the whole form.
+    """
+    if st.button("Start Transcription", type="primary"):
+        # Ensure output dir exists
+        Path(values["output_dir"]).mkdir(parents=True, exist_ok=True)
+        if values["source_mode"] != "local_input":
+            Path(values["scratch_dir"]).mkdir(parents=True, exist_ok=True)
+
+        cmd = build_cli_args(values)
+        st.code(" ".join(cmd))
+
+        env = os.environ.copy()
+        # Provide HF_TOKEN to the subprocess
+        # Priority: user input > env > files
+        if hf_token.strip():
+            env["HF_TOKEN"] = hf_token.strip()
+        elif os.environ.get("HF_TOKEN"):
+            env["HF_TOKEN"] = os.environ["HF_TOKEN"].strip()
+        else:
+            token = load_hf_token()
+            if token:
+                env["HF_TOKEN"] = token
+
+        exit_code = run_command(cmd, env=env)
+        if exit_code == 0:
+            st.success("Done!")
+        else:
+            st.error(f"Command exited with status {exit_code}")
+
+
 def main() -> None:
     st.set_page_config(page_title="EDU ASR", layout="wide")
     st.title("EDU ASR – Transcription GUI")
@@ -165,7 +298,7 @@ def main() -> None:
         min_free_gb = st.number_input("Minimum free GB", min_value=0.0, step=1.0, value=10.0)
 
         st.header("Logging")
-        run_log = st.text_input("Run log CSV", value="out/run_log.csv")
+        run_log = st.text_input("Run log (JSONL)", value="out/run_log.jsonl")
 
         st.header("Hugging Face token")
         existing_token = load_hf_token() or ""
@@ -199,20 +332,9 @@ def main() -> None:
             st.session_state["output_dir"] = "out"
         output_dir = st.text_input("Output folder", key="output_dir")
         if st.button("Choose…", key="choose_output"):
-            # Open a native folder chooser (local app only)
-            try:
-                import tkinter as tk
-                from tkinter import filedialog
-                root = tk.Tk()
-                root.withdraw()
-                initial = st.session_state.get("output_dir") or os.getcwd()
-                path = filedialog.askdirectory(initialdir=initial)
-                root.destroy()
-                if path:
-                    st.session_state["output_dir"] = path
-                    output_dir = path
-            except Exception:
-                st.warning("Folder chooser unavailable; enter a path manually.")
+            path = choose_folder("output_dir")
+            if path:
+                output_dir = path
         config_output = st.text_input("Config file (again)", value=config_path, help="Optional; leave as-is")
     with cols[1]:
         if "input_dir" not in st.session_state:
@@ -221,34 +343,14 @@ def main() -> None:
             st.session_state["scratch_dir"] = "scratch"
         input_dir = st.text_input("Local input folder", key="input_dir")
         if st.button("Choose…", key="choose_input"):
-            try:
-                import tkinter as tk
-                from tkinter import filedialog
-                root = tk.Tk()
-                root.withdraw()
-                initial = st.session_state.get("input_dir") or os.getcwd()
-                path = filedialog.askdirectory(initialdir=initial)
-                root.destroy()
-                if path:
-                    st.session_state["input_dir"] = path
-                    input_dir = path
-            except Exception:
-                st.warning("Folder chooser unavailable; enter a path manually.")
+            path = choose_folder("input_dir")
+            if path:
+                input_dir = path
         scratch_dir = st.text_input("Scratch folder", key="scratch_dir")
         if st.button("Choose…", key="choose_scratch"):
-            try:
-                import tkinter as tk
-                from tkinter import filedialog
-                root = tk.Tk()
-                root.withdraw()
-                initial = st.session_state.get("scratch_dir") or os.getcwd()
-                path = filedialog.askdirectory(initialdir=initial)
-                root.destroy()
-                if path:
-                    st.session_state["scratch_dir"] = path
-                    scratch_dir = path
-            except Exception:
-                st.warning("Folder chooser unavailable; enter a path manually.")
+            path = choose_folder("scratch_dir")
+            if path:
+                scratch_dir = path
     with cols[2]:
         remotes = list_rclone_remotes()
         if remotes:
@@ -275,32 +377,7 @@ def main() -> None:
     )
 
     st.divider()
-    if st.button("Start Transcription", type="primary"):
-        # Ensure output dir exists
-        Path(output_dir).mkdir(parents=True, exist_ok=True)
-        if source_mode != "local_input":
-            Path(scratch_dir).mkdir(parents=True, exist_ok=True)
-
-        cmd = build_cli_args(values)
-        st.code(" ".join(cmd))
-
-        env = os.environ.copy()
-        # Provide HF_TOKEN to the subprocess
-        # Priority: user input > env > files
-        if hf_token.strip():
-            env["HF_TOKEN"] = hf_token.strip()
-        elif os.environ.get("HF_TOKEN"):
-            env["HF_TOKEN"] = os.environ["HF_TOKEN"].strip()
-        else:
-            token = load_hf_token()
-            if token:
-                env["HF_TOKEN"] = token
-
-        exit_code = run_command(cmd, env=env)
-        if exit_code == 0:
-            st.success("Done!")
-        else:
-            st.error(f"Command exited with status {exit_code}")
+    transcription_runner(values, hf_token)
 
 
 if __name__ == "__main__":
@@ -12,25 +12,30 @@ Prerequisites:
 - JSON transcript files in the 'out' directory
 """
 
+import os
 import subprocess
-import json
 from pathlib import Path
 
+from eduasr.db import load_json_file
+
 
 def run_command(cmd, description):
-    """Run a command and print the result."""
+    """Run a command, streaming its output as it arrives."""
     print(f"\n🔄 {description}")
     print(f"Command: {' '.join(cmd)}")
     print("-" * 60)
     
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.stdout:
-        print(result.stdout)
-    if result.stderr:
-        print("STDERR:", result.stderr)
-    
-    return result.returncode == 0
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    ) as proc:
+        for line in proc.stdout:
+            print(line, end="", flush=True)
+        return proc.wait() == 0
 
 
 def main():
@@ -78,8 +83,7 @@ def main():
     if summary_files:
         # Show first summary as example
         example_file = summary_files[0]
-        with open(example_file) as f:
-            summary_data = json.load(f)
+        summary_data = load_json_file(example_file)
         
         print(f"\nFile: {summary_data['filename']}")
         print(f"Duration: {summary_data['total_duration_seconds']:.1f} seconds")
@@ -7,7 +7,7 @@ import argparse
 from pathlib import Path
 
 
-def run_tests(test_type="all", verbose=False, coverage=False, markers=None):
+def run_tests(test_type="all", verbose=False, coverage=False, markers=None, workers=None):
     """Run tests with specified options."""
     
     # Base pytest command
@@ -39,6 +39,11 @@ def run_tests(test_type="all", verbose=False, coverage=False, markers=None):
     if markers:
         cmd.extend(["-m", markers])
     
+    # Run in parallel with pytest-xdist; every test gets its own database and
+    # tmp_path, and xdist_group-marked tests stay together on one worker
+    if workers:
+        cmd.extend(["-n", str(workers), "--dist", "loadgroup"])
+    
     # Add color output
     cmd.append("--color=yes")
     
@@ -76,6 +81,11 @@ def main():
         help="Custom pytest markers to select tests"
     )
     
+    parser.add_argument(
+        "--workers", "-n",
+        help="Parallel worker processes, e.g. 4 or auto (requires pytest-xdist)"
+    )
+    
     args = parser.parse_args()
     
     # Check if we're in the right directory
@@ -87,7 +97,8 @@ def main():
         test_type=args.type,
         verbose=args.verbose,
         coverage=args.coverage,
-        markers=args.markers
+        markers=args.markers,
+        workers=args.workers
     )
 
 
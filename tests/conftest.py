@@ -1,20 +1,60 @@
 """Pytest configuration and shared fixtures."""
 
 import pytest
+import copy
 import tempfile
 import json
 import sqlite3
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock
 import sys
 import os
+import uuid
+from types import MappingProxyType
 
 # Add the parent directory to sys.path so we can import eduasr
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+# eduasr imports whisperx inside the functions that need it; register a fake
+# module before any test runs so the real ML stack is never imported. Use the
+# mock_whisperx fixture to set return values.
+WHISPERX_STUB = MagicMock(name="whisperx")
+sys.modules["whisperx"] = WHISPERX_STUB
+
 from eduasr.db import TranscriptDB
 
 
+# Tests never need crash durability: no journal file, no fsync, one lock held
+# for the connection's lifetime
+FAST_DB_PRAGMAS = (
+    "journal_mode=MEMORY",
+    "synchronous=OFF",
+    "temp_store=MEMORY",
+    "locking_mode=EXCLUSIVE",
+    "cache_size=-65536",
+)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "durable_db: open TranscriptDB with its production PRAGMAs")
+    config.addinivalue_line(
+        "markers", "slow: long-running or wall-clock benchmark tests (run_tests.py --type fast skips them)")
+    # Declared here too so the marker is known when pytest-xdist is not installed
+    config.addinivalue_line(
+        "markers", "xdist_group(name): run these tests on one xdist worker")
+
+
+@pytest.fixture(autouse=True)
+def fast_db_pragmas(request, monkeypatch):
+    """Open every TranscriptDB with the fastest, least durable SQLite settings.
+    
+    Tests marked ``durable_db`` keep the production settings.
+    """
+    if request.node.get_closest_marker("durable_db") is None:
+        monkeypatch.setattr(TranscriptDB, "PRAGMAS", FAST_DB_PRAGMAS)
+
+
 @pytest.fixture
 def temp_dir():
     """Create a temporary directory for test files."""
@@ -22,41 +62,65 @@ def temp_dir():
         yield Path(tmpdir)
 
 
+def _memory_db_uri(prefix):
+    """A unique shared-cache memory database URI, tagged with the xdist worker."""
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return f"file:{prefix}_{worker}_{uuid.uuid4().hex}?mode=memory&cache=shared"
+
+
+@pytest.fixture
+def db_uri():
+    """URI of a private in-memory SQLite database for one test.
+    
+    A shared-cache memory database lives only while a connection is open, so
+    the fixture holds one until the test ends; TranscriptDB can then be
+    opened and closed on the URI as often as the test needs.
+    """
+    uri = _memory_db_uri("test")
+    keeper = sqlite3.connect(uri, uri=True)
+    yield uri
+    keeper.close()
+
+
+# Sample WhisperX transcript JSON data
+SAMPLE_TRANSCRIPT = {
+    "segments": [
+        {
+            "start": 0.0,
+            "end": 2.5,
+            "text": "Hello everyone, welcome to class.",
+            "speaker": "SPEAKER_00",
+            "confidence": 0.95
+        },
+        {
+            "start": 2.5,
+            "end": 5.0,
+            "text": "Today we will learn about math.",
+            "speaker": "SPEAKER_00", 
+            "confidence": 0.92
+        },
+        {
+            "start": 5.0,
+            "end": 7.5,
+            "text": "Can everyone see the board?",
+            "speaker": "SPEAKER_00",
+            "confidence": 0.88
+        },
+        {
+            "start": 7.5,
+            "end": 9.0,
+            "text": "Yes, we can see it clearly.",
+            "speaker": "SPEAKER_01",
+            "confidence": 0.90
+        }
+    ]
+}
+
+
 @pytest.fixture
 def sample_transcript_json():
-    """Sample WhisperX transcript JSON data."""
-    return {
-        "segments": [
-            {
-                "start": 0.0,
-                "end": 2.5,
-                "text": "Hello everyone, welcome to class.",
-                "speaker": "SPEAKER_00",
-                "confidence": 0.95
-            },
-            {
-                "start": 2.5,
-                "end": 5.0,
-                "text": "Today we will learn about math.",
-                "speaker": "SPEAKER_00", 
-                "confidence": 0.92
-            },
-            {
-                "start": 5.0,
-                "end": 7.5,
-                "text": "Can everyone see the board?",
-                "speaker": "SPEAKER_00",
-                "confidence": 0.88
-            },
-            {
-                "start": 7.5,
-                "end": 9.0,
-                "text": "Yes, we can see it clearly.",
-                "speaker": "SPEAKER_01",
-                "confidence": 0.90
-            }
-        ]
-    }
+    """Sample WhisperX transcript JSON data (a fresh copy per test)."""
+    return copy.deepcopy(SAMPLE_TRANSCRIPT)
 
 
 @pytest.fixture
@@ -66,8 +130,7 @@ def sample_transcript_files(temp_dir, sample_transcript_json):
     
     # JSON file
     json_file = temp_dir / f"{base_name}.json"
-    with open(json_file, 'w') as f:
-        json.dump(sample_transcript_json, f, indent=2)
+    json_file.write_text(json.dumps(sample_transcript_json, indent=2))
     
     # SRT file
     srt_file = temp_dir / f"{base_name}.srt"
@@ -112,24 +175,19 @@ Yes, we can see it clearly.
     with open(txt_file, 'w') as f:
         f.write("Hello everyone, welcome to class. Today we will learn about math. Can everyone see the board? Yes, we can see it clearly.")
     
-    # .done file
-    done_file = temp_dir / f"{base_name}.done"
-    done_file.touch()
-    
     return {
         'json': json_file,
         'srt': srt_file,
         'vtt': vtt_file,
         'txt': txt_file,
-        'done': done_file,
         'base_name': base_name
     }
 
 
-@pytest.fixture
-def test_db(temp_dir):
-    """Create a test database with sample data."""
-    db_path = temp_dir / "test.sqlite"
+@pytest.fixture(scope="module")
+def test_db_template(tmp_path_factory):
+    """Build the sample-data database once per test module."""
+    db_path = tmp_path_factory.mktemp("test_db") / "test.sqlite"
     
     with TranscriptDB(str(db_path)) as db:
         # Add a sample transcript manually
@@ -159,63 +217,132 @@ def test_db(temp_dir):
             ) VALUES (?, ?, ?, ?, ?, ?, ?)
         """, segments_data)
         
-        # Manually populate FTS table (since triggers might not work in test)
-        cursor.executemany("""
-            INSERT INTO segments_fts (text, speaker, filename, title)
-            VALUES (?, ?, ?, ?)
-        """, [
-            ("Hello everyone, welcome to class.", "SPEAKER_00", "test-lesson-001", "Test Lesson 001"),
-            ("Today we will learn about math.", "SPEAKER_00", "test-lesson-001", "Test Lesson 001"),
-            ("Can everyone see the board?", "SPEAKER_00", "test-lesson-001", "Test Lesson 001"),
-            ("Yes, we can see it clearly.", "SPEAKER_01", "test-lesson-001", "Test Lesson 001"),
-        ])
-        
         db.conn.commit()
     
     return str(db_path)
 
 
 @pytest.fixture
-def mock_whisperx():
-    """Mock WhisperX for testing transcription without actual model loading."""
-    with patch('eduasr.transcribe_batch.whisperx') as mock:
-        # Mock the load_model function
-        mock_model = Mock()
-        mock_model.transcribe.return_value = {
-            "segments": [
-                {
-                    "start": 0.0,
-                    "end": 5.0,
-                    "text": "This is a test transcription.",
-                    "confidence": 0.95
-                }
-            ]
-        }
-        mock.load_model.return_value = mock_model
-        
-        # Mock load_audio function
-        mock.load_audio.return_value = [0.1, 0.2, 0.3]  # Fake audio data
-        
-        # Mock align function
-        mock.align.return_value = {
-            "segments": [
-                {
-                    "start": 0.0,
-                    "end": 5.0,
-                    "text": "This is a test transcription.",
-                    "confidence": 0.95,
-                    "speaker": "SPEAKER_00"
-                }
-            ]
-        }
-        
-        yield mock
+def test_db(test_db_template, db_uri):
+    """A private in-memory copy of the sample-data database, as a URI."""
+    src = sqlite3.connect(test_db_template)
+    dst = sqlite3.connect(db_uri, uri=True)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+    return db_uri
+
+
+GOLDEN_FILENAME = "golden-lesson"
+
+
+@pytest.fixture(scope="session")
+def golden_imported_db(tmp_path_factory):
+    """URI of a database with SAMPLE_TRANSCRIPT imported as ``golden-lesson``.
+    
+    The import runs once per session; use ``imported_db`` to get a private
+    copy for a test.
+    """
+    transcripts_dir = tmp_path_factory.mktemp("golden")
+    (transcripts_dir / f"{GOLDEN_FILENAME}.json").write_text(json.dumps(SAMPLE_TRANSCRIPT))
+    
+    uri = _memory_db_uri("golden")
+    keeper = sqlite3.connect(uri, uri=True)
+    with TranscriptDB(uri) as db:
+        stats = db.import_transcript_files(str(transcripts_dir))
+    assert stats['imported'] == 1
+    yield uri
+    keeper.close()
+
+
+@pytest.fixture
+def imported_db(golden_imported_db, db_uri):
+    """A private, writable in-memory copy of the golden imported database."""
+    src = sqlite3.connect(golden_imported_db, uri=True)
+    dst = sqlite3.connect(db_uri, uri=True)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+    return db_uri
+
+
+@pytest.fixture
+def mock_db_class(monkeypatch):
+    """Replace eduasr.cli.TranscriptDB with a mock class.
+    
+    ``mock_db_class.return_value`` is the database the CLI opens; it is its
+    own context manager.
+    """
+    mock_db = Mock()
+    mock_db.__enter__ = Mock(return_value=mock_db)
+    mock_db.__exit__ = Mock(return_value=None)
+    db_class = Mock(return_value=mock_db)
+    monkeypatch.setattr('eduasr.cli.TranscriptDB', db_class)
+    return db_class
 
 
 @pytest.fixture
+def mock_whisperx():
+    """The session's fake ``whisperx`` module, reset and given default return values.
+    
+    Function-scoped, unlike ``sample_config``: tests set their own return
+    values on it, so it is reset for every test.
+    """
+    mock = WHISPERX_STUB
+    mock.reset_mock(return_value=True, side_effect=True)
+    
+    # Mock the load_model function
+    mock_model = Mock()
+    mock_model.transcribe.return_value = {
+        "segments": [
+            {
+                "start": 0.0,
+                "end": 5.0,
+                "text": "This is a test transcription.",
+                "confidence": 0.95
+            }
+        ]
+    }
+    mock.load_model.return_value = mock_model
+    
+    # Mock load_audio function
+    mock.load_audio.return_value = [0.1, 0.2, 0.3]  # Fake audio data
+    
+    # Mock align function
+    mock.align.return_value = {
+        "segments": [
+            {
+                "start": 0.0,
+                "end": 5.0,
+                "text": "This is a test transcription.",
+                "confidence": 0.95,
+                "speaker": "SPEAKER_00"
+            }
+        ]
+    }
+    
+    return mock
+
+
+@pytest.fixture(scope="session")
+def golden_files():
+    """Expected writer outputs from tests/data, keyed by file name."""
+    data_dir = Path(__file__).parent / 'data'
+    return {path.name: path.read_text(encoding='utf-8') for path in data_dir.iterdir()}
+
+
+@pytest.fixture(scope="session")
 def sample_config():
-    """Sample configuration for testing."""
-    return {
+    """Sample configuration for testing.
+    
+    Built once per session and shared, so it is read-only; tests that need
+    to change a setting should copy it first (``dict(sample_config)``).
+    """
+    return MappingProxyType({
         'model_size': 'tiny',
         'language': 'en',
         'device': 'cpu',
@@ -226,4 +353,4 @@ def sample_config():
         'write_srt': True,
         'write_vtt': True,
         'write_txt': True
-    }
+    })
@@ -172,7 +172,7 @@ class TestCLIMain:
     """Test CLI main function execution."""
     
     @patch('eduasr.cli.transcribe_batch')
-    def test_transcribe_command_execution(self, mock_transcribe_batch):
+    def test_transcribe_command_execution(self, mock_transcribe_batch, monkeypatch):
         """Test transcribe command calls transcribe_batch.main()."""
         mock_transcribe_batch.main.return_value = 0
         
@@ -182,25 +182,21 @@ class TestCLIMain:
             '--model', 'tiny'
         ]
         
-        with patch('sys.argv', ['eduasr.cli'] + test_args):
-            result = main()
+        monkeypatch.setattr(sys, 'argv', ['eduasr.cli'] + test_args)
+        result = main()
         
         assert result == 0
         mock_transcribe_batch.main.assert_called_once()
     
-    @patch('eduasr.cli.TranscriptDB')
-    def test_import_command_execution(self, mock_db_class):
+    def test_import_command_execution(self, mock_db_class, monkeypatch):
         """Test import command execution."""
-        mock_db = Mock()
-        mock_db.__enter__ = Mock(return_value=mock_db)
-        mock_db.__exit__ = Mock(return_value=None)
+        mock_db = mock_db_class.return_value
         mock_db.import_transcript_files.return_value = {
             'imported': 5,
             'updated': 2,
             'skipped': 1,
             'errors': 0
         }
-        mock_db_class.return_value = mock_db
         
         test_args = [
             'import',
@@ -208,22 +204,18 @@ class TestCLIMain:
             '--db', 'test.sqlite'
         ]
         
-        with patch('sys.argv', ['eduasr.cli'] + test_args):
-            result = main()
+        monkeypatch.setattr(sys, 'argv', ['eduasr.cli'] + test_args)
+        result = main()
         
         assert result == 0
         mock_db_class.assert_called_once_with('test.sqlite')
         mock_db.import_transcript_files.assert_called_once_with('transcripts', False)
     
-    @patch('eduasr.cli.TranscriptDB')
     @patch('eduasr.cli.print_search_results')
-    def test_search_command_execution(self, mock_print_results, mock_db_class):
+    def test_search_command_execution(self, mock_print_results, mock_db_class, monkeypatch):
         """Test search command execution."""
-        mock_db = Mock()
-        mock_db.__enter__ = Mock(return_value=mock_db)
-        mock_db.__exit__ = Mock(return_value=None)
+        mock_db = mock_db_class.return_value
         mock_db.search.return_value = [{'text': 'test result'}]
-        mock_db_class.return_value = mock_db
         
         test_args = [
             'search',
@@ -232,23 +224,19 @@ class TestCLIMain:
             '--limit', '10'
         ]
         
-        with patch('sys.argv', ['eduasr.cli'] + test_args):
-            result = main()
+        monkeypatch.setattr(sys, 'argv', ['eduasr.cli'] + test_args)
+        result = main()
         
         assert result == 0
         mock_db_class.assert_called_once_with('test.sqlite')
         mock_db.search.assert_called_once_with('test query', 10)
         mock_print_results.assert_called_once()
     
-    @patch('eduasr.cli.TranscriptDB')
     @patch('eduasr.cli.print_kwic_results')
-    def test_kwic_command_execution(self, mock_print_kwic, mock_db_class):
+    def test_kwic_command_execution(self, mock_print_kwic, mock_db_class, monkeypatch):
         """Test KWIC command execution."""
-        mock_db = Mock()
-        mock_db.__enter__ = Mock(return_value=mock_db)
-        mock_db.__exit__ = Mock(return_value=None)
+        mock_db = mock_db_class.return_value
         mock_db.kwic.return_value = [{'keyword': 'test'}]
-        mock_db_class.return_value = mock_db
         
         test_args = [
             'kwic',
@@ -258,21 +246,18 @@ class TestCLIMain:
             '--limit', '15'
         ]
         
-        with patch('sys.argv', ['eduasr.cli'] + test_args):
-            result = main()
+        monkeypatch.setattr(sys, 'argv', ['eduasr.cli'] + test_args)
+        result = main()
         
         assert result == 0
         mock_db_class.assert_called_once_with('test.sqlite')
         mock_db.kwic.assert_called_once_with('keyword', 5, 15)
         mock_print_kwic.assert_called_once()
     
-    @patch('eduasr.cli.TranscriptDB')
     @patch('eduasr.cli.format_time')
-    def test_list_command_execution(self, mock_format_time, mock_db_class):
+    def test_list_command_execution(self, mock_format_time, mock_db_class, monkeypatch):
         """Test list command execution."""
-        mock_db = Mock()
-        mock_db.__enter__ = Mock(return_value=mock_db)
-        mock_db.__exit__ = Mock(return_value=None)
+        mock_db = mock_db_class.return_value
         mock_db.list_transcripts.return_value = [
             {
                 'title': 'Test Transcript',
@@ -283,7 +268,6 @@ class TestCLIMain:
                 'created_at': '2023-01-01 12:00:00'
             }
         ]
-        mock_db_class.return_value = mock_db
         mock_format_time.return_value = "02:00"
         
         test_args = [
@@ -292,21 +276,18 @@ class TestCLIMain:
             '--limit', '25'
         ]
         
-        with patch('sys.argv', ['eduasr.cli'] + test_args):
-            result = main()
+        monkeypatch.setattr(sys, 'argv', ['eduasr.cli'] + test_args)
+        result = main()
         
         assert result == 0
         mock_db_class.assert_called_once_with('test.sqlite')
         mock_db.list_transcripts.assert_called_once_with(25)
         mock_format_time.assert_called_once_with(120.0)
     
-    @patch('eduasr.cli.TranscriptDB')
     @patch('eduasr.cli.format_time')
-    def test_stats_command_execution(self, mock_format_time, mock_db_class):
+    def test_stats_command_execution(self, mock_format_time, mock_db_class, monkeypatch):
         """Test stats command execution."""
-        mock_db = Mock()
-        mock_db.__enter__ = Mock(return_value=mock_db)
-        mock_db.__exit__ = Mock(return_value=None)
+        mock_db = mock_db_class.return_value
         mock_db.get_transcript_stats.return_value = {
             'transcript_count': 10,
             'segment_count': 500,
@@ -315,7 +296,6 @@ class TestCLIMain:
                 {'filename': 'long.json', 'duration_seconds': 3600}
             ]
         }
-        mock_db_class.return_value = mock_db
         mock_format_time.return_value = "01:00:00"
         
         test_args = [
@@ -323,8 +303,8 @@ class TestCLIMain:
             '--db', 'test.sqlite'
         ]
         
-        with patch('sys.argv', ['eduasr.cli'] + test_args):
-            result = main()
+        monkeypatch.setattr(sys, 'argv', ['eduasr.cli'] + test_args)
+        result = main()
         
         assert result == 0
         mock_db_class.assert_called_once_with('test.sqlite')
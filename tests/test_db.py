@@ -12,6 +12,7 @@ from eduasr.db import TranscriptDB, format_time, print_search_results, print_kwi
 class TestTranscriptDB:
     """Test cases for TranscriptDB class."""
     
+    @pytest.mark.durable_db
     def test_init_creates_tables(self, temp_dir):
         """Test that database initialization creates required tables."""
         db_path = temp_dir / "test.sqlite"
@@ -26,10 +27,18 @@ class TestTranscriptDB:
             assert 'transcripts' in tables
             assert 'segments' in tables
             assert 'segments_fts' in tables
+            
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
+            indexes = [row[0] for row in cursor.fetchall()]
+            
+            assert 'idx_segments_transcript' in indexes
+            assert 'idx_segments_speaker' in indexes
+            
+            assert cursor.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
     
-    def test_calculate_file_hash(self, temp_dir):
+    def test_calculate_file_hash(self, db_uri, temp_dir):
         """Test file hash calculation."""
-        db_path = temp_dir / "test.sqlite"
+        db_path = db_uri
         test_file = temp_dir / "test.txt"
         
         with open(test_file, 'w') as f:
@@ -41,11 +50,11 @@ class TestTranscriptDB:
             
             # Same file should produce same hash
             assert hash1 == hash2
-            assert len(hash1) == 32  # MD5 hash length
+            assert len(hash1) == 32  # 16-byte BLAKE2b digest
     
-    def test_generate_title(self, temp_dir):
+    def test_generate_title(self, db_uri):
         """Test title generation from filename."""
-        db_path = temp_dir / "test.sqlite"
+        db_path = db_uri
         
         with TranscriptDB(str(db_path)) as db:
             # Test basic filename
@@ -61,9 +70,9 @@ class TestTranscriptDB:
             assert db.generate_title("") == ""
             assert db.generate_title("123") == "123"
     
-    def test_import_single_transcript(self, temp_dir, sample_transcript_files, sample_transcript_json):
+    def test_import_single_transcript(self, db_uri, temp_dir, sample_transcript_files, sample_transcript_json):
         """Test importing a single transcript file."""
-        db_path = temp_dir / "test.sqlite"
+        db_path = db_uri
         
         with TranscriptDB(str(db_path)) as db:
             result = db.import_single_transcript(
@@ -91,9 +100,9 @@ class TestTranscriptDB:
             )
             assert result2 == "skipped"
     
-    def test_import_transcript_files(self, temp_dir, sample_transcript_files):
+    def test_import_transcript_files(self, db_uri, temp_dir, sample_transcript_files):
         """Test importing multiple transcript files."""
-        db_path = temp_dir / "test.sqlite"
+        db_path = db_uri
         
         with TranscriptDB(str(db_path)) as db:
             stats = db.import_transcript_files(str(temp_dir), force=False)
@@ -103,6 +112,37 @@ class TestTranscriptDB:
             assert stats['skipped'] == 0
             assert stats['errors'] == 0
     
+    def test_import_many_bounds_read_ahead(self, db_uri, temp_dir, sample_transcript_json):
+        """Test that import_many parses only a bounded window of files ahead of the inserts."""
+        json_files = []
+        for i in range(30):
+            json_file = temp_dir / f"lesson_{i:02d}.json"
+            json_file.write_text(json.dumps(sample_transcript_json))
+            json_files.append(json_file)
+        
+        hashed = []
+        ahead = []
+        real_hash = TranscriptDB.calculate_file_hash
+        real_import = TranscriptDB.import_single_transcript
+        
+        def counting_hash(self, path):
+            hashed.append(path)
+            return real_hash(self, path)
+        
+        def counting_import(self, json_file, *args, **kwargs):
+            ahead.append(len(hashed) - len(ahead))
+            return real_import(self, json_file, *args, **kwargs)
+        
+        with TranscriptDB(str(db_uri)) as db, \
+             patch('eduasr.db.os.cpu_count', return_value=1), \
+             patch.object(TranscriptDB, 'calculate_file_hash', counting_hash), \
+             patch.object(TranscriptDB, 'import_single_transcript', counting_import):
+            stats = db.import_many(json_files)
+        
+        assert stats['imported'] == 30
+        # 5 workers -> at most 10 files in flight besides the one being inserted
+        assert max(ahead) <= 11
+    
     def test_search(self, test_db):
         """Test full-text search functionality."""
         with TranscriptDB(test_db) as db:
@@ -111,6 +151,12 @@ class TestTranscriptDB:
             assert len(results) == 1
             assert "math" in results[0]['text'].lower()
             
+            # The index holds exactly one entry per segment, with no orphans
+            fts_hits = db.conn.execute(
+                "SELECT COUNT(*) FROM segments_fts WHERE segments_fts MATCH 'math'").fetchone()[0]
+            assert fts_hits == 1
+            db.conn.execute("INSERT INTO segments_fts(segments_fts, rank) VALUES('integrity-check', 1)")
+            
             # Search for non-existing text
             results = db.search("chemistry")
             assert len(results) == 0
@@ -131,6 +177,22 @@ class TestTranscriptDB:
             assert 'right_context' in result
             assert result['keyword'].lower() == 'math'
     
+    def test_kwic_context_is_exact_word_count(self, test_db):
+        """Test that kwic returns exactly N words each side, for phrases and wide windows."""
+        words = [f"w{i}" for i in range(40)]
+        text = ' '.join(words[:20] + ['talks', 'about', 'fractions'] + words[20:])
+        with TranscriptDB(test_db) as db:
+            db.append_segments(1, [{"start": 9.0, "end": 30.0, "text": text, "speaker": "SPEAKER_00"}])
+            
+            result = db.kwic("talks about", context_words=10)[0]
+            assert result['keyword'] == 'talks about'
+            assert result['left_context'] == ' '.join(words[10:20])
+            assert result['right_context'] == ' '.join(['fractions'] + words[20:29])
+            
+            result = db.kwic("fractions", context_words=40)[0]
+            assert result['left_context'] == ' '.join(words[:20] + ['talks', 'about'])
+            assert result['right_context'] == ' '.join(words[20:])
+    
     def test_get_transcript_stats(self, test_db):
         """Test getting database statistics."""
         with TranscriptDB(test_db) as db:
@@ -154,6 +216,25 @@ class TestTranscriptDB:
             assert transcript['duration_seconds'] == 9.0
             assert transcript['segment_count'] == 4
             assert transcript['speaker_count'] == 2
+    
+    def test_append_segments(self, test_db):
+        """Test appending segments to an existing transcript."""
+        with TranscriptDB(test_db) as db:
+            added = db.append_segments(1, [
+                {"start": 9.0, "end": 11.0, "text": "Fractions come next.", "speaker": "SPEAKER_00"},
+                {"start": 11.0, "end": 13.5, "text": "Open your workbooks.", "speaker": "SPEAKER_02"},
+            ])
+            assert added == 2
+            
+            indexes = [row[0] for row in db.conn.execute(
+                "SELECT segment_index FROM segments WHERE transcript_id = 1 ORDER BY segment_index")]
+            assert indexes == [0, 1, 2, 3, 4, 5]
+            
+            transcript = db.list_transcripts()[0]
+            assert transcript['segment_count'] == 6
+            assert transcript['speaker_count'] == 3
+            assert transcript['duration_seconds'] == 13.5
+            assert len(db.search("workbooks")) == 1
 
 
 class TestUtilityFunctions:
@@ -212,14 +293,13 @@ class TestUtilityFunctions:
 class TestDatabaseIntegration:
     """Integration tests for database operations."""
     
-    def test_full_import_and_search_workflow(self, temp_dir, sample_transcript_json):
+    def test_full_import_and_search_workflow(self, db_uri, temp_dir, sample_transcript_json):
         """Test complete workflow from import to search."""
         # Create sample files
         json_file = temp_dir / "workflow-test.json"
-        with open(json_file, 'w') as f:
-            json.dump(sample_transcript_json, f)
+        json_file.write_text(json.dumps(sample_transcript_json))
         
-        db_path = temp_dir / "workflow.sqlite"
+        db_path = db_uri
         
         # Import and search
         with TranscriptDB(str(db_path)) as db:
@@ -240,9 +320,9 @@ class TestDatabaseIntegration:
             assert stats['transcript_count'] == 1
             assert stats['segment_count'] == 4
     
-    def test_database_context_manager(self, temp_dir):
+    def test_database_context_manager(self, db_uri):
         """Test database context manager properly closes connections."""
-        db_path = temp_dir / "context.sqlite"
+        db_path = db_uri
         
         # Use context manager
         with TranscriptDB(str(db_path)) as db:
@@ -254,29 +334,28 @@ class TestDatabaseIntegration:
         with pytest.raises(sqlite3.ProgrammingError):
             cursor.execute("SELECT 1")
     
-    def test_error_handling_malformed_json(self, temp_dir):
+    def test_error_handling_malformed_json(self, db_uri, temp_dir):
         """Test error handling for malformed JSON files."""
         # Create malformed JSON file
         bad_json_file = temp_dir / "bad.json"
         with open(bad_json_file, 'w') as f:
             f.write("{ invalid json content")
         
-        db_path = temp_dir / "error.sqlite"
+        db_path = db_uri
         
         with TranscriptDB(str(db_path)) as db:
             stats = db.import_transcript_files(str(temp_dir))
             assert stats['errors'] == 1
             assert stats['imported'] == 0
     
-    def test_duplicate_filename_handling(self, temp_dir, sample_transcript_json):
+    def test_duplicate_filename_handling(self, db_uri, temp_dir, sample_transcript_json):
         """Test handling of duplicate filenames with different content."""
         json_file = temp_dir / "duplicate-test.json"
         
         # First import
-        with open(json_file, 'w') as f:
-            json.dump(sample_transcript_json, f)
+        json_file.write_text(json.dumps(sample_transcript_json))
         
-        db_path = temp_dir / "duplicate.sqlite"
+        db_path = db_uri
         
         with TranscriptDB(str(db_path)) as db:
             result1 = db.import_single_transcript(json_file, temp_dir, force=False)
@@ -291,8 +370,7 @@ class TestDatabaseIntegration:
                 "confidence": 0.85
             })
             
-            with open(json_file, 'w') as f:
-                json.dump(sample_transcript_json, f)
+            json_file.write_text(json.dumps(sample_transcript_json))
             
             result2 = db.import_single_transcript(json_file, temp_dir, force=True)
             assert result2 == "updated"
@@ -301,3 +379,33 @@ class TestDatabaseIntegration:
             cursor = db.conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM segments WHERE transcript_id = 1")
             assert cursor.fetchone()[0] == 5
+            
+            # The FTS index still matches its content after the re-import
+            cursor.execute("INSERT INTO segments_fts(segments_fts, rank) VALUES('integrity-check', 1)")
+            assert len(db.search("additional")) == 1
+    
+    def test_rebuilds_fts_index_from_old_schema(self, temp_dir):
+        """Test that an index pointed at the segments table is rebuilt on open."""
+        db_path = temp_dir / "old.sqlite"
+        TranscriptDB(str(db_path)).close()
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript("""
+            DROP TRIGGER segments_ai;
+            DROP TRIGGER segments_ad;
+            DROP TABLE segments_fts;
+            CREATE VIRTUAL TABLE segments_fts USING fts5(text, speaker, filename, title,
+                                                         content='segments', content_rowid='id');
+            INSERT INTO transcripts (id, filename, title) VALUES (1, 'lesson-1', 'Lesson');
+            INSERT INTO segments (transcript_id, segment_index, start_time, end_time, speaker, text)
+            VALUES (1, 0, 0.0, 2.0, 'SPEAKER_00', 'Fractions are parts of a whole.');
+        """)
+        conn.close()
+        
+        with TranscriptDB(str(db_path)) as db:
+            results = db.search("fractions")
+            kwic = db.kwic("parts", context_words=2)
+        
+        assert [r['filename'] for r in results] == ['lesson-1']
+        assert kwic[0]['left_context'] == 'Fractions are'
+        assert kwic[0]['keyword'] == 'parts'
+        assert kwic[0]['right_context'] == 'of a'
@@ -14,12 +14,11 @@ from eduasr.cli import main
 class TestCompleteWorkflow:
     """Test complete workflows from transcription to search."""
     
-    def test_import_and_search_workflow(self, temp_dir, sample_transcript_json):
+    def test_import_and_search_workflow(self, db_uri, temp_dir, sample_transcript_json):
         """Test complete workflow: create transcripts -> import -> search."""
         # Create sample transcript files
         json_file = temp_dir / "integration-test.json"
-        with open(json_file, 'w') as f:
-            json.dump(sample_transcript_json, f)
+        json_file.write_text(json.dumps(sample_transcript_json))
         
         srt_file = temp_dir / "integration-test.srt"
         with open(srt_file, 'w') as f:
@@ -32,60 +31,29 @@ Hello everyone, welcome to class.
 Today we will learn about math.
 """)
         
-        db_path = temp_dir / "integration.sqlite"
-        
-        # Step 1: Import transcripts
-        with patch('sys.argv', [
-            'eduasr.cli', 'import',
-            '--transcripts-dir', str(temp_dir),
-            '--db', str(db_path)
-        ]):
-            result = main()
-            assert result == 0
-        
-        # Step 2: Search transcripts
-        with patch('sys.argv', [
-            'eduasr.cli', 'search',
-            '--db', str(db_path),
-            '--query', 'math',
-            '--limit', '10'
-        ]):
-            with patch('eduasr.cli.print_search_results') as mock_print:
-                result = main()
-                assert result == 0
-                mock_print.assert_called_once()
-                
-                # Check that search results were passed to print function
-                call_args = mock_print.call_args[0]
-                results = call_args[0]
-                query = call_args[1]
-                
-                assert query == 'math'
-                assert len(results) >= 1
-                assert any('math' in r['text'].lower() for r in results)
-        
-        # Step 3: KWIC analysis
-        with patch('sys.argv', [
-            'eduasr.cli', 'kwic',
-            '--db', str(db_path),
-            '--query', 'welcome',
-            '--context', '5',
-            '--limit', '5'
-        ]):
-            with patch('eduasr.cli.print_kwic_results') as mock_print_kwic:
-                result = main()
-                assert result == 0
-                mock_print_kwic.assert_called_once()
-        
-        # Step 4: Database statistics
-        with patch('sys.argv', [
-            'eduasr.cli', 'stats',
-            '--db', str(db_path)
-        ]):
-            result = main()
-            assert result == 0
+        # One connection for the whole workflow; the CLI front end is
+        # covered by the main() tests below and in test_cli.py
+        with TranscriptDB(db_uri) as db:
+            # Step 1: Import transcripts
+            stats = db.import_transcript_files(str(temp_dir))
+            assert stats['imported'] == 1
+            assert stats['errors'] == 0
+            
+            # Step 2: Search transcripts
+            results = db.search('math', 10)
+            assert len(results) >= 1
+            assert any('math' in r['text'].lower() for r in results)
+            
+            # Step 3: KWIC analysis
+            kwic_results = db.kwic('welcome', 5, 5)
+            assert len(kwic_results) >= 1
+            assert all(r['keyword'].lower() == 'welcome' for r in kwic_results)
+            
+            # Step 4: Database statistics
+            db_stats = db.get_transcript_stats()
+            assert db_stats['transcript_count'] == 1
+            assert db_stats['segment_count'] == len(sample_transcript_json['segments'])
     
-    @patch('eduasr.transcribe_batch.whisperx')
     def test_transcribe_to_search_workflow(self, mock_whisperx, temp_dir):
         """Test workflow from transcription to search (mocked transcription)."""
         # Mock WhisperX components
@@ -124,9 +92,8 @@ Today we will learn about math.
             '--output_dir', str(output_dir),
             '--model', 'tiny'
         ]):
-            with patch('eduasr.transcribe_batch.tqdm', side_effect=lambda x, desc=None: x):
-                result = main()
-                assert result == 0
+            result = main()
+            assert result == 0
         
         # Check that output files were created
         json_output = output_dir / "test-lesson.json"
@@ -162,7 +129,7 @@ Today we will learn about math.
 class TestErrorRecovery:
     """Test error recovery and edge cases in integrated workflows."""
     
-    def test_partial_import_recovery(self, temp_dir):
+    def test_partial_import_recovery(self, db_uri, temp_dir):
         """Test recovery from partial import failures."""
         # Create one good transcript and one bad transcript
         good_transcript = {
@@ -172,14 +139,13 @@ class TestErrorRecovery:
         }
         
         good_file = temp_dir / "good.json"
-        with open(good_file, 'w') as f:
-            json.dump(good_transcript, f)
+        good_file.write_text(json.dumps(good_transcript))
         
         bad_file = temp_dir / "bad.json"
         with open(bad_file, 'w') as f:
             f.write("{ invalid json content")
         
-        db_path = temp_dir / "recovery.sqlite"
+        db_path = db_uri
         
         # Import should partially succeed
         with patch('sys.argv', [
@@ -196,52 +162,32 @@ class TestErrorRecovery:
             assert len(transcripts) == 1
             assert transcripts[0]['filename'] == 'good'
     
-    def test_database_consistency_after_updates(self, temp_dir, sample_transcript_json):
-        """Test database consistency after multiple import operations."""
-        json_file = temp_dir / "consistency-test.json"
-        db_path = temp_dir / "consistency.sqlite"
-        
-        # First import
-        with open(json_file, 'w') as f:
-            json.dump(sample_transcript_json, f)
-        
-        with patch('sys.argv', [
-            'eduasr.cli', 'import',
-            '--transcripts-dir', str(temp_dir),
-            '--db', str(db_path)
-        ]):
-            result = main()
-            assert result == 0
-        
-        # Modify transcript and re-import with force
-        sample_transcript_json['segments'].append({
-            'start': 10.0,
-            'end': 12.0,
-            'text': 'Additional content added.',
-            'speaker': 'SPEAKER_02',
-            'confidence': 0.85
-        })
-        
-        with open(json_file, 'w') as f:
-            json.dump(sample_transcript_json, f)
-        
-        with patch('sys.argv', [
-            'eduasr.cli', 'import',
-            '--transcripts-dir', str(temp_dir),
-            '--db', str(db_path),
-            '--force'
-        ]):
-            result = main()
-            assert result == 0
+    def test_database_consistency_after_updates(self, imported_db):
+        """Test database consistency after adding segments to an imported transcript."""
+        # imported_db already holds the sample transcript as "golden-lesson";
+        # JSON re-import with force is covered in test_db.py
+        with TranscriptDB(imported_db) as db:
+            transcript_id = db.conn.execute(
+                "SELECT id FROM transcripts WHERE filename = 'golden-lesson'").fetchone()['id']
+            added = db.append_segments(transcript_id, [{
+                'start': 10.0,
+                'end': 12.0,
+                'text': 'Additional content added.',
+                'speaker': 'SPEAKER_02',
+                'confidence': 0.85
+            }])
+            assert added == 1
         
         # Verify database consistency
-        with TranscriptDB(str(db_path)) as db:
+        with TranscriptDB(imported_db) as db:
             # Should still have only one transcript
             transcripts = db.list_transcripts()
             assert len(transcripts) == 1
             
-            # But should have updated segment count
+            # But should have updated segment and speaker counts
             assert transcripts[0]['segment_count'] == 5
+            assert transcripts[0]['speaker_count'] == 3
+            assert transcripts[0]['duration_seconds'] == 12.0
             
             # Search should find new content
             results = db.search('Additional content')
@@ -280,9 +226,9 @@ class TestCLIIntegrationEdgeCases:
             # Database should be created
             assert nonexistent_db.exists()
     
-    def test_cli_with_empty_database(self, temp_dir):
+    def test_cli_with_empty_database(self, db_uri):
         """Test CLI behavior with empty database."""
-        db_path = temp_dir / "empty.sqlite"
+        db_path = db_uri
         
         # Create empty database
         with TranscriptDB(str(db_path)) as db:
@@ -309,9 +255,9 @@ class TestCLIIntegrationEdgeCases:
 class TestLargeDatasetHandling:
     """Test handling of larger datasets (marked as slow tests)."""
     
-    def test_large_transcript_import(self, temp_dir):
+    def test_large_transcript_import(self, db_uri, temp_dir):
         """Test importing a large number of transcript files."""
-        db_path = temp_dir / "large.sqlite"
+        db_path = db_uri
         
         # Create multiple transcript files
         for i in range(10):  # Reduced from 100 for faster testing
@@ -329,17 +275,12 @@ class TestLargeDatasetHandling:
             }
             
             json_file = temp_dir / f"transcript_{i:03d}.json"
-            with open(json_file, 'w') as f:
-                json.dump(transcript, f)
+            json_file.write_text(json.dumps(transcript))
         
-        # Import all transcripts
-        with patch('sys.argv', [
-            'eduasr.cli', 'import',
-            '--transcripts-dir', str(temp_dir),
-            '--db', str(db_path)
-        ]):
-            result = main()
-            assert result == 0
+        # Import all transcripts in one batch
+        with TranscriptDB(str(db_path)) as db:
+            import_stats = db.import_many(sorted(temp_dir.glob("*.json")))
+            assert import_stats == {'imported': 10, 'updated': 0, 'skipped': 0, 'errors': 0}
         
         # Verify all were imported
         with TranscriptDB(str(db_path)) as db: